@@ -1,6 +1,9 @@
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import ValidationError
+from typing import Optional
 from .auth_handler import decodeJWT
+import schemas
 
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -11,18 +14,21 @@ class JWTBearer(HTTPBearer):
         if credentials:
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=403, detail="Formato de autenticação inválido.")
-            if not self.verify_jwt(credentials.credentials):
+            principal = self.verify_jwt(credentials.credentials)
+            if principal is None:
                 raise HTTPException(status_code=403, detail="Token inválido ou expirado.")
-            return credentials.credentials
+            return principal
         else:
             raise HTTPException(status_code=403, detail="Código de autorização inválido.")
 
-    def verify_jwt(self, jwtoken: str):
-        isTokenValid: bool = False
+    def verify_jwt(self, jwtoken: str) -> Optional[schemas.Principal]:
         try:
             payload = decodeJWT(jwtoken)
         except:
             payload = None
-        if payload:
-            isTokenValid = True
-        return isTokenValid
\ No newline at end of file
+        if not payload:
+            return None
+        try:
+            return schemas.Principal(**payload)
+        except ValidationError:
+            return None
@@ -1,29 +1,56 @@
 
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
+from typing import Tuple
+import functools, threading, time
 import jwt
 from decouple import config
 
-JWT_SECRET = config("secret")
-JWT_ALGORITHM = config("algorithm")
+@functools.lru_cache(maxsize=None)
+def jwt_settings() -> Tuple[str, str]:
+    # Lidos no primeiro uso, não no import: sem secret/algorithm o worker sobe e
+    # o /health/ready acusa o problema
+    return config("secret"), config("algorithm")
+
+# Tokens já verificados ficam em cache (LRU) até o seu exp
+JWT_CACHE_SIZE = config("jwt_cache_size", default=4096, cast=int)
+
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
 
 def token_response(token: str):
     return {
         "access_token": token
     }
 
-def signJWT(user_id: str):
+def signJWT(user_id: int, email: str, tipo: str):
     payload = {
         "user_id": user_id,
+        "email": email,
+        "tipo": tipo,
         "exp": datetime.now(timezone.utc) + timedelta(minutes=20)
     }
 
-    token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    secret, algorithm = jwt_settings()
+    token = jwt.encode(payload, secret, algorithm=algorithm)
 
     return token_response(token)
 
 def decodeJWT(token: str):
+    with _token_cache_lock:
+        decoded_token = _token_cache.get(token)
+        if decoded_token is not None:
+            if decoded_token["exp"] > time.time():
+                _token_cache.move_to_end(token)
+                return decoded_token
+            del _token_cache[token]
     try:
-        decoded_token = jwt.decode(token, JWT_SECRET, algorithms=[ JWT_ALGORITHM ])
-        return decoded_token
+        secret, algorithm = jwt_settings()
+        decoded_token = jwt.decode(token, secret, algorithms=[ algorithm ])
     except jwt.ExpiredSignatureError:
-        return None
\ No newline at end of file
+        return None
+    with _token_cache_lock:
+        _token_cache[token] = decoded_token
+        if len(_token_cache) > JWT_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return decoded_token
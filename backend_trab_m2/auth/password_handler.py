@@ -0,0 +1,55 @@
+import asyncio, multiprocessing, os, time
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+from decouple import config
+import metrics
+
+# O bcrypt prende a CPU por ~250 ms por chamada; roda num pool de processos
+# limitado para não travar o event loop nem disputar o GIL com as rotas.
+BCRYPT_WORKERS = config("bcrypt_workers", default=os.cpu_count() or 1, cast=int)
+# Custo do bcrypt; hashes com outro custo são refeitos no próximo login bem-sucedido
+BCRYPT_ROUNDS = config("bcrypt_rounds", default=12, cast=int)
+
+_executor = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BCRYPT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def hash_password_sync(senha: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
+    return bcrypt.hashpw(senha.encode('utf8'), bcrypt.gensalt(rounds=rounds)).decode('utf8')
+
+def check_password_sync(senha: str, senha_hash: str) -> bool:
+    return bcrypt.checkpw(senha.encode('utf8'), senha_hash.encode('utf8'))
+
+def needs_rehash(senha_hash: str) -> bool:
+    # Formato: $2b$<custo>$<salt+hash>
+    try:
+        return int(senha_hash.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def hash_password(senha: str) -> str:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_get_executor(), hash_password_sync, senha, BCRYPT_ROUNDS)
+    finally:
+        metrics.BCRYPT_DURATION.observe(time.perf_counter() - start, "hash")
+
+async def check_password(senha: str, senha_hash: str) -> bool:
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        return await loop.run_in_executor(_get_executor(), check_password_sync, senha, senha_hash)
+    finally:
+        metrics.BCRYPT_DURATION.observe(time.perf_counter() - start, "check")
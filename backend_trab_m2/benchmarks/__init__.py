@@ -0,0 +1,5 @@
+# Benchmarks de carga (executar de dentro de backend_trab_m2):
+#
+#   python -m benchmarks.generate --reset          popula o banco com dados sintéticos
+#   python -m benchmarks.load --saida atual.json   dispara as rotas contra a API no ar
+#   python -m benchmarks.report atual.json --base anterior.json   compara dois commits
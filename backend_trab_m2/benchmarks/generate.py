@@ -0,0 +1,166 @@
+import argparse, datetime, io, random, sys, time
+from sqlalchemy import text
+from typing import Callable, Iterator, Sequence
+from auth import password_handler
+from database import engine, SessionLocal
+import counters, migrate, models
+
+# Gerador determinístico de dados: a mesma semente e a mesma escala produzem
+# exatamente as mesmas linhas, com ids explícitos (as chaves estrangeiras são
+# calculadas, não consultadas). A carga é feita por COPY, em lotes.
+#
+# Cada imóvel tem o próprio endereço e no máximo uma transação (Imovel.endereco e
+# Imovel.transacao são um-para-um), então transacoes <= imoveis.
+SEED = 42
+SENHA = "benchmark"
+BATCH_SIZE = 100_000
+
+VOLUMES = {
+    "proprietarios": 50_000,
+    "corretores": 5_000,
+    "tags": 200,
+    "imoveis": 500_000,
+    "transacoes": 400_000,
+}
+TABLES = ('imovel_tag', 'transacao', 'imovel', 'endereco', 'tag', 'telefone', 'corretor', 'proprietario', 'usuario')
+
+PALAVRAS = ('casa', 'apartamento', 'sobrado', 'cobertura', 'kitnet', 'studio', 'chácara', 'terreno', 'sala',
+            'ampla', 'reformada', 'mobiliada', 'vista', 'mar', 'centro', 'piscina', 'churrasqueira', 'sacada',
+            'silenciosa', 'iluminada', 'próxima', 'praia', 'universidade', 'comércio', 'garagem', 'jardim')
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João', 'Larissa', 'Marcos')
+SOBRENOMES = ('Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento', 'Lima')
+# CEPs concentrados em poucas regiões, como num cadastro real
+REGIOES = ('880', '881', '882', '883', '890', '891', '010', '013', '200', '222', '300', '400', '700', '900')
+
+Row = Sequence
+
+def _copy(cursor, table : str, columns : Sequence[str], rows : Iterator[Row]):
+    # Formato texto do COPY; os valores gerados não têm tab, quebra de linha nem barra invertida
+    buffer, pending = io.StringIO(), 0
+    def flush():
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        buffer.seek(0)
+        buffer.truncate()
+    for row in rows:
+        buffer.write('\t'.join('\\N' if value is None else str(value) for value in row) + '\n')
+        pending += 1
+        if pending == BATCH_SIZE:
+            flush()
+            pending = 0
+    if pending:
+        flush()
+
+def _nome(rng : random.Random) -> str:
+    return f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+
+def _usuarios(volumes : dict, senha_hash : str) -> Iterator[Row]:
+    rng = random.Random(SEED)
+    total = volumes["proprietarios"] + volumes["corretores"]
+    for id in range(1, total + 1):
+        tipo = "proprietario" if id <= volumes["proprietarios"] else "corretor"
+        yield (id, _nome(rng), f"usuario{id}@benchmark.local", senha_hash, f"{id:011d}", "", tipo)
+
+def _telefones(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 1)
+    for id in range(1, volumes["proprietarios"] + volumes["corretores"] + 1):
+        yield (id, id, f"(48) 9{rng.randrange(10**7, 10**8)}", rng.randrange(1, 3))
+
+def _tags(volumes : dict) -> Iterator[Row]:
+    for id in range(1, volumes["tags"] + 1):
+        yield (id, f"{PALAVRAS[id % len(PALAVRAS)]} {id}", id % 3 == 0)
+
+def _enderecos(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 2)
+    for id in range(1, volumes["imoveis"] + 1):
+        yield (id, rng.randrange(1, 5000), rng.choice(REGIOES) + f"{rng.randrange(0, 100_000):05d}")
+
+def _imoveis(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 3)
+    for id in range(1, volumes["imoveis"] + 1):
+        tipo = rng.randrange(1, 5)
+        tamanho = rng.randrange(25, 400)
+        quartos = min(tamanho // 30 + rng.randrange(0, 2), 6)
+        # Os primeiros `transacoes` imóveis são os negociados
+        disponivel = id > volumes["transacoes"]
+        yield (id, rng.randrange(1, volumes["proprietarios"] + 1), id, f"{rng.choice(PALAVRAS).capitalize()} {id}", tipo,
+               round(tamanho * rng.uniform(2_000, 12_000), 2), ' '.join(rng.choices(PALAVRAS, k=rng.randrange(5, 20))),
+               tamanho, quartos, rng.randrange(0, 4), max(1, quartos - rng.randrange(0, 2)), disponivel, "")
+
+def _imovel_tags(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 4)
+    for id in range(1, volumes["imoveis"] + 1):
+        for id_tag in sorted(rng.sample(range(1, volumes["tags"] + 1), k=min(rng.randrange(0, 6), volumes["tags"]))):
+            yield (id, id_tag)
+
+def _transacoes(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 5)
+    first_corretor = volumes["proprietarios"] + 1
+    inicio = datetime.date(2015, 1, 1)
+    for id in range(1, volumes["transacoes"] + 1):
+        yield (id, rng.randrange(first_corretor, first_corretor + volumes["corretores"]), id,
+               inicio + datetime.timedelta(days=rng.randrange(0, 3650)), round(rng.uniform(50_000, 3_000_000), 2))
+
+def _proprietarios(volumes : dict) -> Iterator[Row]:
+    return ((id,) for id in range(1, volumes["proprietarios"] + 1))
+
+def _corretores(volumes : dict) -> Iterator[Row]:
+    rng = random.Random(SEED + 6)
+    first = volumes["proprietarios"] + 1
+    return ((id, round(rng.uniform(1, 8), 2)) for id in range(first, first + volumes["corretores"]))
+
+# Ordem de carga respeitando as chaves estrangeiras
+STEPS = (
+    ("usuario", ('id', 'nome', 'email', 'senha', 'cpf', 'path_foto', 'tipo'), None),
+    ("proprietario", ('id',), _proprietarios),
+    ("corretor", ('id', 'percentual_comissao'), _corretores),
+    ("telefone", ('id', 'id_usuario', 'numero', 'tipo'), _telefones),
+    ("tag", ('id', 'nome', 'tipo'), _tags),
+    ("endereco", ('id', 'numero', 'cep'), _enderecos),
+    ("imovel", ('id', 'id_proprietario', 'id_endereco', 'nome', 'tipo', 'valor', 'descricao', 'tamanho', 'quartos',
+                'vagas', 'banheiros', 'disponivel', 'path_foto'), _imoveis),
+    ("imovel_tag", ('id_imovel', 'id_tag'), _imovel_tags),
+    ("transacao", ('id', 'id_corretor', 'id_imovel', 'data', 'valor_total'), _transacoes),
+)
+
+def scaled(scale : float) -> dict:
+    volumes = { name: max(1, int(total * scale)) for name, total in VOLUMES.items() }
+    volumes["transacoes"] = min(volumes["transacoes"], volumes["imoveis"])
+    return volumes
+
+def generate(volumes : dict, reset : bool = False, log : Callable[[str], None] = print):
+    migrate.migrate(log)
+    with SessionLocal() as db:
+        if db.scalar(text("SELECT EXISTS (SELECT 1 FROM usuario)")) and not reset:
+            raise SystemExit("O banco já tem dados; use --reset para apagá-los antes da carga.")
+        db.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        # Um único hash para todos: o bcrypt de milhares de senhas dominaria a carga
+        senha_hash = password_handler.hash_password_sync(SENHA)
+        with db.connection().connection.cursor() as cursor:
+            for table, columns, rows in STEPS:
+                start = time.perf_counter()
+                _copy(cursor, table, columns, _usuarios(volumes, senha_hash) if rows is None else rows(volumes))
+                log(f"{table}: {time.perf_counter() - start:.1f}s")
+        # Sequências depois dos ids explícitos
+        for table in TABLES:
+            if table != 'imovel_tag':
+                db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"))
+        db.commit()
+        for model in (models.Usuario, models.Proprietario, models.Corretor, models.Telefone, models.Tag,
+                      models.Endereco, models.Imovel, models.Transacao):
+            counters.recount(db, model)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Popula o banco (database_url) com dados sintéticos determinísticos.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplicador dos volumes padrão")
+    parser.add_argument("--reset", action="store_true", help="apaga os dados existentes antes da carga")
+    for name, total in VOLUMES.items():
+        parser.add_argument(f"--{name}", type=int, help=f"padrão: {total} x scale")
+    args = parser.parse_args()
+    volumes = scaled(args.scale)
+    volumes.update({ name: getattr(args, name) for name in VOLUMES if getattr(args, name) is not None })
+    volumes["transacoes"] = min(volumes["transacoes"], volumes["imoveis"])
+    print(', '.join(f"{name}={total}" for name, total in volumes.items()), file=sys.stderr)
+    generate(volumes, args.reset, log=lambda message: print(message, file=sys.stderr))
@@ -0,0 +1,271 @@
+import argparse, asyncio, datetime, io, itertools, json, random, subprocess, sys, time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from benchmarks import generate, report
+
+# Driver de carga: cada cenário exercita uma ou mais rotas do main.py com
+# `concorrencia` clientes em paralelo por `duracao` segundos (depois de um
+# aquecimento não medido). As latências são agrupadas por rota (método + modelo
+# do caminho) e o resultado é salvo em JSON para o benchmarks.report.
+#
+# Os ids sorteados seguem os volumes do benchmarks.generate: use o mesmo --scale
+# da carga. Cenários de escrita criam e apagam o que criam; os do grupo
+# "pesado" (exportações, bulk, importação) fazem o banco crescer.
+RESOURCES = ('usuarios', 'proprietarios', 'corretores', 'tags', 'telefones', 'enderecos', 'imoveis', 'transacoes')
+GROUPS = ('leitura', 'escrita', 'pesado')
+
+class Run:
+    def __init__(self, client : httpx.AsyncClient, volumes : dict, seed : int):
+        self.client = client
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+        self.unique = itertools.count()
+        # Sufixo por execução para e-mails e CPFs criados durante a carga
+        self.prefix = f"{int(time.time()) % 10**5:05d}"
+        self.recording = False
+        self.samples : Dict[str, List[float]] = {}
+        self.errors : Dict[str, int] = {}
+
+    async def request(self, route : str, method : str, url : str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.samples.setdefault(route, []).append(elapsed * 1000)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+    def id(self, resource : str) -> int:
+        v = self.volumes
+        usuarios = v["proprietarios"] + v["corretores"]
+        if resource == 'corretores':
+            return self.rng.randrange(v["proprietarios"] + 1, usuarios + 1)
+        last = {
+            'usuarios': usuarios, 'telefones': usuarios, 'proprietarios': v["proprietarios"], 'tags': v["tags"],
+            'enderecos': v["imoveis"], 'imoveis': v["imoveis"], 'transacoes': v["transacoes"]
+        }[resource]
+        return self.rng.randrange(1, last + 1)
+
+    def usuario(self, **extra : Any) -> Dict[str, Any]:
+        n = next(self.unique)
+        return { "nome": "Carga", "email": f"carga{self.prefix}_{n}@benchmark.local", "senha": generate.SENHA,
+                 "cpf": f"9{self.prefix}{n % 10**5:05d}", "path_foto": "", **extra }
+
+    def imovel(self, id_endereco : int) -> Dict[str, Any]:
+        return { "id_proprietario": self.id('proprietarios'), "id_endereco": id_endereco, "nome": "Imóvel de carga",
+                 "tipo": self.rng.randrange(1, 5), "valor": round(self.rng.uniform(100_000, 2_000_000), 2),
+                 "descricao": "apartamento amplo próximo ao centro", "tamanho": self.rng.randrange(30, 300),
+                 "quartos": self.rng.randrange(1, 5), "vagas": self.rng.randrange(0, 3), "banheiros": self.rng.randrange(1, 4),
+                 "path_foto": "", "id_tags": self.rng.sample(range(1, self.volumes["tags"] + 1), k=min(3, self.volumes["tags"])) }
+
+    def endereco(self) -> Dict[str, Any]:
+        return { "numero": self.rng.randrange(1, 5000), "cep": self.rng.choice(generate.REGIOES) + f"{self.rng.randrange(0, 100_000):05d}" }
+
+Scenario = Callable[[Run], Awaitable[None]]
+SCENARIOS : Dict[str, Dict[str, Any]] = {}
+
+def scenario(name : str, group : str):
+    def register(function : Scenario) -> Scenario:
+        SCENARIOS[name] = { "run": function, "group": group }
+        return function
+    return register
+
+def _body(response : Optional[httpx.Response]) -> Any:
+    return response.json() if response is not None and response.status_code < 400 else None
+
+# cadastro, login e monitoramento
+@scenario("signup", "escrita")
+async def signup(run : Run):
+    await run.request("POST /api/signup", "POST", "/api/signup", json=run.usuario())
+
+@scenario("login", "leitura")
+async def login(run : Run):
+    await run.request("POST /api/login", "POST", "/api/login",
+                      json={ "email": f"usuario{run.id('usuarios')}@benchmark.local", "senha": generate.SENHA })
+
+@scenario("monitoramento", "leitura")
+async def monitoramento(run : Run):
+    await run.request("GET /api/db/pool", "GET", "/api/db/pool")
+    await run.request("GET /metrics", "GET", "/metrics")
+
+# leituras de todos os recursos
+def _reads(resource : str):
+    async def reads(run : Run):
+        await run.request(f"GET /api/{resource}/{{id}}", "GET", f"/api/{resource}/{run.id(resource)}")
+        page = _body(await run.request(f"GET /api/{resource}/", "GET", f"/api/{resource}/", params={ "limit": 20 }))
+        if page and page.get("next_cursor"):
+            await run.request(f"GET /api/{resource}/ (cursor)", "GET", f"/api/{resource}/",
+                              params={ "limit": 20, "cursor": page["next_cursor"] })
+        await run.request(f"GET /api/{resource}/ (contagem)", "GET", f"/api/{resource}/", params={ "limit": 20, "contagem": "exata" })
+    return reads
+
+for resource in RESOURCES:
+    scenario(f"{resource}_leitura", "leitura")(_reads(resource))
+
+@scenario("imoveis_consultas", "leitura")
+async def imoveis_consultas(run : Run):
+    minimo = run.rng.randrange(100_000, 2_000_000, 50_000)
+    await run.request("GET /api/imoveis/ (filtros)", "GET", "/api/imoveis/", params={
+        "valor_min": minimo, "valor_max": minimo * 2, "tipo": run.rng.randrange(1, 5),
+        "tags_any": run.rng.sample(range(1, run.volumes["tags"] + 1), k=min(2, run.volumes["tags"])), "ordem": "-valor"
+    })
+    await run.request("GET /api/imoveis/ (fields)", "GET", "/api/imoveis/", params={ "fields": "id,nome,valor", "limit": 50 })
+    await run.request("GET /api/imoveis/search", "GET", "/api/imoveis/search", params={ "q": run.rng.choice(generate.PALAVRAS) })
+    await run.request("GET /api/imoveis/regioes", "GET", "/api/imoveis/regioes", params={ "cep_prefixo": run.rng.choice(generate.REGIOES) })
+    id = run.id('imoveis')
+    first = await run.request("GET /api/imoveis/{id}", "GET", f"/api/imoveis/{id}")
+    if first is not None and first.headers.get("etag"):
+        await run.request("GET /api/imoveis/{id} (304)", "GET", f"/api/imoveis/{id}", headers={ "If-None-Match": first.headers["etag"] })
+
+# escritas: cria, altera e apaga o que criou
+async def _crud(run : Run, resource : str, body : Dict[str, Any], update : Dict[str, Any]) -> None:
+    created = _body(await run.request(f"POST /api/{resource}/", "POST", f"/api/{resource}/", json=body))
+    if created is None:
+        return
+    id = created["id"]
+    await run.request(f"PUT /api/{resource}/{{id}}", "PUT", f"/api/{resource}/{id}", json={ **body, **update })
+    await run.request(f"DELETE /api/{resource}/{{id}}", "DELETE", f"/api/{resource}/{id}")
+
+@scenario("usuarios_escrita", "escrita")
+async def usuarios_escrita(run : Run):
+    await _crud(run, 'usuarios', run.usuario(), { "nome": "Carga alterada" })
+
+@scenario("proprietarios_escrita", "escrita")
+async def proprietarios_escrita(run : Run):
+    await _crud(run, 'proprietarios', run.usuario(), { "nome": "Carga alterada" })
+
+@scenario("corretores_escrita", "escrita")
+async def corretores_escrita(run : Run):
+    await _crud(run, 'corretores', run.usuario(percentual_comissao=3.5), { "percentual_comissao": 4.0 })
+
+@scenario("tags_escrita", "escrita")
+async def tags_escrita(run : Run):
+    await _crud(run, 'tags', { "nome": f"carga {next(run.unique)}", "tipo": True }, { "tipo": False })
+
+@scenario("telefones_escrita", "escrita")
+async def telefones_escrita(run : Run):
+    await _crud(run, 'telefones', { "id_usuario": run.id('usuarios'), "numero": "(48) 99999-0000", "tipo": 1 }, { "tipo": 2 })
+
+@scenario("enderecos_escrita", "escrita")
+async def enderecos_escrita(run : Run):
+    await _crud(run, 'enderecos', run.endereco(), { "numero": 1 })
+
+@scenario("imoveis_escrita", "escrita")
+async def imoveis_escrita(run : Run):
+    endereco = _body(await run.request("POST /api/enderecos/", "POST", "/api/enderecos/", json=run.endereco()))
+    if endereco is None:
+        return
+    body = run.imovel(endereco["id"])
+    imovel = _body(await run.request("POST /api/imoveis/", "POST", "/api/imoveis/", json=body))
+    if imovel is not None:
+        await run.request("PUT /api/imoveis/{id}", "PUT", f"/api/imoveis/{imovel['id']}", json={ **body, "valor": body["valor"] * 1.1 })
+        transacao = { "id_corretor": run.id('corretores'), "id_imovel": imovel["id"], "data": datetime.date.today().isoformat(),
+                      "valor_total": body["valor"] }
+        await _crud(run, 'transacoes', transacao, { "valor_total": body["valor"] * 0.95 })
+        await run.request("DELETE /api/imoveis/{id}", "DELETE", f"/api/imoveis/{imovel['id']}")
+    await run.request("DELETE /api/enderecos/{id}", "DELETE", f"/api/enderecos/{endereco['id']}")
+
+# pesados
+def _export(resource : str):
+    async def export(run : Run):
+        await run.request(f"GET /api/{resource}/export", "GET", f"/api/{resource}/export")
+    return export
+
+for resource in RESOURCES:
+    scenario(f"{resource}_export", "pesado")(_export(resource))
+
+@scenario("bulk", "pesado")
+async def bulk(run : Run):
+    await run.request("POST /api/tags/bulk", "POST", "/api/tags/bulk",
+                      json=[ { "nome": f"bulk {next(run.unique)}", "tipo": False } for _ in range(100) ])
+    await run.request("POST /api/enderecos/bulk", "POST", "/api/enderecos/bulk", json=[ run.endereco() for _ in range(100) ])
+    await run.request("POST /api/telefones/bulk", "POST", "/api/telefones/bulk",
+                      json=[ { "id_usuario": run.id('usuarios'), "numero": "(48) 3333-0000", "tipo": 2 } for _ in range(100) ])
+    await run.request("POST /api/imoveis/bulk", "POST", "/api/imoveis/bulk", json=[ run.imovel(run.id('enderecos')) for _ in range(20) ])
+    await run.request("POST /api/transacoes/bulk", "POST", "/api/transacoes/bulk", json=[
+        { "id_corretor": run.id('corretores'), "id_imovel": run.id('imoveis'), "data": "2024-01-01", "valor_total": 1.0 } for _ in range(20)
+    ])
+
+@scenario("importacao", "pesado")
+async def importacao(run : Run):
+    lines = []
+    for _ in range(1000):
+        endereco, imovel = run.endereco(), run.imovel(0)
+        row = { column: imovel[column] for column in ('id_proprietario', 'nome', 'tipo', 'valor', 'descricao', 'tamanho',
+                                                      'quartos', 'vagas', 'banheiros', 'path_foto') }
+        lines.append(json.dumps({ **row, **endereco, "tags": [] }))
+    await run.request("POST /api/imoveis/import", "POST", "/api/imoveis/import",
+                      files={ "arquivo": ("carga.ndjson", io.BytesIO('\n'.join(lines).encode('utf8'))) })
+
+async def _phase(run : Run, function : Scenario, concurrency : int, seconds : float) -> float:
+    deadline = time.perf_counter() + seconds
+    async def worker():
+        while time.perf_counter() < deadline:
+            await function(run)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+async def run_all(url : str, names : List[str], volumes : dict, concurrency : int, duration : float, warmup : float,
+                  seed : int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        run = Run(client, volumes, seed)
+        rotas = {}
+        for name in names:
+            print(f"{name}...", file=sys.stderr)
+            # Token novo a cada cenário (expira em 20 minutos)
+            response = await client.post("/api/login", json={ "email": "usuario1@benchmark.local", "senha": generate.SENHA })
+            response.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+            run.recording = False
+            await _phase(run, SCENARIOS[name]["run"], concurrency, warmup)
+            run.samples, run.errors, run.recording = {}, {}, True
+            elapsed = await _phase(run, SCENARIOS[name]["run"], concurrency, duration)
+            for route, latencies in run.samples.items():
+                rotas[route] = report.summarize(latencies, run.errors.get(route, 0), elapsed)
+    return rotas
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run([ "git", "rev-parse", "--short", "HEAD" ], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga nas rotas da API; salva p50/p95/p99 e vazão por rota.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--scale", type=float, default=1.0, help="o mesmo usado no benchmarks.generate")
+    parser.add_argument("--grupos", default="leitura,escrita", help=f"entre {', '.join(GROUPS)}")
+    parser.add_argument("--cenarios", help="nomes separados por vírgula (padrão: todos dos grupos)")
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--duracao", type=float, default=20, help="segundos medidos por cenário")
+    parser.add_argument("--aquecimento", type=float, default=3, help="segundos não medidos por cenário")
+    parser.add_argument("--seed", type=int, default=generate.SEED)
+    parser.add_argument("--saida", help="arquivo JSON com o resultado")
+    args = parser.parse_args()
+    if args.cenarios:
+        names = [ name.strip() for name in args.cenarios.split(',') ]
+        unknown = [ name for name in names if name not in SCENARIOS ]
+        if unknown:
+            parser.error(f"cenários desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(SCENARIOS)})")
+    else:
+        groups = { group.strip() for group in args.grupos.split(',') }
+        names = [ name for name, entry in SCENARIOS.items() if entry["group"] in groups ]
+    result = {
+        "commit": _commit(),
+        "data": datetime.datetime.now().isoformat(timespec='seconds'),
+        "parametros": { "url": args.url, "scale": args.scale, "concorrencia": args.concorrencia,
+                        "duracao": args.duracao, "cenarios": names },
+        "rotas": asyncio.run(run_all(args.url, names, generate.scaled(args.scale), args.concorrencia, args.duracao,
+                                     args.aquecimento, args.seed))
+    }
+    print(report.table(result))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,80 @@
+import argparse, json, math, sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Relatório dos resultados do benchmarks.load: percentis (rank mais próximo) e
+# vazão por rota e, com --base, a variação contra outra execução (outro commit).
+# Sai com código 1 se o p95 de alguma rota piorou mais que --limite por cento.
+LIMIT = 10.0
+
+def percentile(ordered : Sequence[float], p : float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarize(latencies : List[float], errors : int, elapsed : float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requisicoes": len(ordered),
+        "erros": errors,
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50": round(percentile(ordered, 50), 2),
+        "p95": round(percentile(ordered, 95), 2),
+        "p99": round(percentile(ordered, 99), 2),
+        "media": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "max": round(ordered[-1], 2) if ordered else 0.0
+    }
+
+def _format(rows : List[Sequence[Any]]) -> str:
+    widths = [ max(len(str(row[index])) for row in rows) for index in range(len(rows[0])) ]
+    return '\n'.join('  '.join(str(value).ljust(width) if index == 0 else str(value).rjust(width)
+                               for index, (value, width) in enumerate(zip(row, widths))) for row in rows)
+
+def table(result : Dict[str, Any]) -> str:
+    rows = [ ("rota", "req", "erros", "req/s", "p50 ms", "p95 ms", "p99 ms") ]
+    for route, stats in sorted(result["rotas"].items()):
+        rows.append((route, stats["requisicoes"], stats["erros"], stats["rps"], stats["p50"], stats["p95"], stats["p99"]))
+    return f"commit {result.get('commit') or '?'} ({result.get('data')})\n" + _format(rows)
+
+def _delta(current : float, base : float) -> str:
+    if not base:
+        return "-"
+    return f"{(current - base) / base * 100:+.1f}%"
+
+def compare(current : Dict[str, Any], base : Dict[str, Any], limit : float = LIMIT) -> Tuple[str, List[str]]:
+    rows = [ ("rota", "req/s", "Δ", "p50 ms", "Δ", "p95 ms", "Δ", "p99 ms", "Δ") ]
+    regressions = []
+    for route, stats in sorted(current["rotas"].items()):
+        previous = base["rotas"].get(route)
+        if previous is None:
+            rows.append((route, stats["rps"], "novo", stats["p50"], "", stats["p95"], "", stats["p99"], ""))
+            continue
+        rows.append((route, stats["rps"], _delta(stats["rps"], previous["rps"]),
+                     stats["p50"], _delta(stats["p50"], previous["p50"]),
+                     stats["p95"], _delta(stats["p95"], previous["p95"]),
+                     stats["p99"], _delta(stats["p99"], previous["p99"])))
+        if previous["p95"] and (stats["p95"] - previous["p95"]) / previous["p95"] * 100 > limit:
+            regressions.append(route)
+    header = f"commit {current.get('commit') or '?'} contra {base.get('commit') or '?'}"
+    if current.get("parametros") != base.get("parametros"):
+        header += "\natenção: parâmetros de carga diferentes entre as execuções"
+    return header + '\n' + _format(rows), regressions
+
+def _load(path : str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mostra ou compara resultados do benchmarks.load.")
+    parser.add_argument("resultado")
+    parser.add_argument("--base", help="resultado de referência (ex.: do commit anterior)")
+    parser.add_argument("--limite", type=float, default=LIMIT, help="piora máxima aceita no p95, em %%")
+    args = parser.parse_args()
+    current = _load(args.resultado)
+    if args.base is None:
+        print(table(current))
+        sys.exit(0)
+    text, regressions = compare(current, _load(args.base), args.limite)
+    print(text)
+    if regressions:
+        print(f"\np95 piorou mais de {args.limite}% em: {', '.join(regressions)}")
+    sys.exit(1 if regressions else 0)
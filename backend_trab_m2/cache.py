@@ -0,0 +1,155 @@
+import threading, time
+from collections import OrderedDict
+from decouple import config
+from typing import Any, Dict, Iterable, Optional, Set
+from projection import Tree
+import etag
+
+# Cache de respostas de GET por id. Guarda o JSON já serializado e, para cada
+# entrada, as entidades embutidas nela (ex.: Imovel:7 depende de Proprietario:3),
+# de modo que alterar uma entidade invalida também as respostas que a embutem.
+#
+# Com mais de um worker o backend deve ser o Redis (cache_url=redis://...): as
+# entradas e as invalidações são compartilhadas e o TTL é CACHE_TTL. Sem
+# cache_url cada processo tem o seu LRU, e uma escrita só invalida o cache do
+# worker que a recebeu; os demais podem servir a versão antiga por até
+# LOCAL_CACHE_TTL segundos, por isso o TTL local é bem mais curto.
+CACHE_TTL = config("cache_ttl", default=30, cast=int)
+LOCAL_CACHE_TTL = config("local_cache_ttl", default=2, cast=int)
+CACHE_SIZE = config("cache_size", default=10000, cast=int)
+CACHE_URL = config("cache_url", default="")
+
+# Proprietario e Corretor são também Usuario: a mesma linha aparece nos três recursos
+ALIASES = {
+    'Usuario': ('Usuario', 'Proprietario', 'Corretor'),
+    'Proprietario': ('Usuario', 'Proprietario', 'Corretor'),
+    'Corretor': ('Usuario', 'Proprietario', 'Corretor')
+}
+
+class LocalBackend:
+    def __init__(self, maxsize : int = CACHE_SIZE, ttl : int = LOCAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Fora do LRU: uma dependência não pode sair antes das entradas que a usam.
+        # _dependencies (entrada -> dependências) limpa _dependents quando a entrada sai.
+        self._dependents : Dict[str, Set[str]] = {}
+        self._dependencies : Dict[str, Set[str]] = {}
+
+    def _remove(self, key : str):
+        self._entries.pop(key, None)
+        for dependency in self._dependencies.pop(key, ()):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    async def get(self, key : str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key : str, value : bytes):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    async def delete(self, *keys : str):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    async def add_dependent(self, key : str, dependent : str):
+        with self._lock:
+            if dependent not in self._entries:
+                return
+            self._dependents.setdefault(key, set()).add(dependent)
+            self._dependencies.setdefault(dependent, set()).add(key)
+
+    async def pop_dependents(self, key : str) -> Set[str]:
+        with self._lock:
+            return self._dependents.pop(key, set())
+
+class RedisBackend:
+    def __init__(self, url : str, ttl : int = CACHE_TTL):
+        import redis.asyncio as redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key : str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key : str, value : bytes):
+        await self.client.set(key, value, ex=self.ttl)
+
+    async def delete(self, *keys : str):
+        await self.client.delete(*keys)
+
+    async def add_dependent(self, key : str, dependent : str):
+        key = f"dependentes:{key}"
+        async with self.client.pipeline() as pipe:
+            await pipe.sadd(key, dependent).expire(key, self.ttl).execute()
+
+    async def pop_dependents(self, key : str) -> Set[str]:
+        key = f"dependentes:{key}"
+        async with self.client.pipeline() as pipe:
+            members, _ = await pipe.smembers(key).delete(key).execute()
+        return { member.decode('utf8') for member in members }
+
+def dependencies(entity : Any, tree : Tree) -> Set[str]:
+    # Toda entidade embutida na resposta, exceto a própria raiz
+    keys = { f"{name}:{id}" for name, id, _ in etag.versions(entity, tree) }
+    keys.discard(f"{type(entity).__name__}:{entity.id}")
+    return keys
+
+class EntityCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend.ttl > 0
+
+    async def get(self, resource : str, id : int) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        return await self.backend.get(f"{resource}:{id}")
+
+    async def set(self, resource : str, id : int, body : bytes, depends_on : Iterable[str] = ()):
+        if not self.enabled:
+            return
+        key = f"{resource}:{id}"
+        await self.backend.set(key, body)
+        for dependency in depends_on:
+            await self.backend.add_dependent(dependency, key)
+
+    async def invalidate(self, resource : str, id : int):
+        if not self.enabled:
+            return
+        pending = [ f"{name}:{id}" for name in ALIASES.get(resource, (resource,)) ]
+        seen = set()
+        while pending:
+            key = pending.pop()
+            if key in seen:
+                continue
+            seen.add(key)
+            await self.backend.delete(key)
+            pending.extend(await self.backend.pop_dependents(key))
+
+entity_cache = EntityCache(RedisBackend(CACHE_URL) if CACHE_URL else LocalBackend())
+
+def set_backend(backend):
+    # Permite trocar o backend (ex.: LocalBackend no lugar do Redis em testes)
+    entity_cache.backend = backend
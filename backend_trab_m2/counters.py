@@ -0,0 +1,110 @@
+import json, random
+from decouple import config
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import CompileError
+from sqlalchemy.orm import Session
+from typing import Any, List
+from database import Base
+import cache, models
+
+# Totais das listagens paginadas.
+#
+# exata: contadores por tabela em models.Contador, atualizados na mesma transação
+# de cada INSERT/DELETE (eventos do ORM e inserções em lote). O contador de uma
+# tabela é a soma dos seus slots: cada escrita soma a sua variação num slot
+# sorteado entre 1 e COUNTER_SLOTS, para que transações concorrentes não esperem
+# pelo lock da mesma linha. Na primeira leitura o slot 0 recebe
+# COUNT(*) - soma dos outros slots, num único comando: contagem e soma vêm do
+# mesmo snapshot, então uma escrita ainda não confirmada não entra em nenhuma das
+# duas e, ao confirmar, traz a linha e a variação juntas (nada se perde).
+# aproximada: estatísticas do planejador (pg_class.reltuples ou a estimativa de
+# linhas do EXPLAIN quando há filtros), sem varrer a tabela.
+#
+# Contagens com filtros não têm contador; ficam em cache por COUNT_CACHE_TTL segundos.
+COUNT_CACHE_TTL = config("count_cache_ttl", default=10, cast=int)
+COUNTER_SLOTS = config("counter_slots", default=16, cast=int)
+MODES = ('exata', 'aproximada')
+
+filtered_cache = cache.LocalBackend(ttl=COUNT_CACHE_TTL)
+
+def _tables(model : Base) -> List[str]:
+    # Com herança (Proprietario, Corretor) uma linha ocupa também a tabela do pai
+    return [ table.name for table in inspect(model).tables ]
+
+def add(db : Session, model : Base, delta : int):
+    if not delta:
+        return
+    slot = random.randint(1, COUNTER_SLOTS)
+    for tabela in _tables(model):
+        statement = insert(models.Contador).values(tabela=tabela, slot=slot, total=delta)
+        db.connection().execute(statement.on_conflict_do_update(
+            index_elements=[ 'tabela', 'slot' ], set_={ 'total': models.Contador.total + statement.excluded.total }
+        ))
+
+@event.listens_for(Session, 'after_flush')
+def _track(db : Session, flush_context : Any):
+    deltas = {}
+    for entity in db.new:
+        deltas[type(entity)] = deltas.get(type(entity), 0) + 1
+    for entity in db.deleted:
+        deltas[type(entity)] = deltas.get(type(entity), 0) - 1
+    for model, delta in deltas.items():
+        if model is not models.Contador:
+            add(db, model, delta)
+
+def _base(model : Base):
+    # Slot 0 = COUNT(*) - outros slots, calculados no mesmo comando (mesmo snapshot)
+    tabela = model.__tablename__
+    others = select(func.coalesce(func.sum(models.Contador.total), 0)) \
+        .where(models.Contador.tabela == tabela, models.Contador.slot != 0).scalar_subquery()
+    statement = insert(models.Contador).values(
+        tabela=tabela,
+        slot=0,
+        total=select(func.count()).select_from(model.__table__).scalar_subquery() - others
+    )
+    return statement.on_conflict_do_update(index_elements=[ 'tabela', 'slot' ], set_={ 'total': statement.excluded.total })
+
+def exact(db : Session, model : Base) -> int:
+    tabela = model.__tablename__
+    query = select(func.sum(models.Contador.total), func.count().filter(models.Contador.slot == 0)) \
+        .where(models.Contador.tabela == tabela)
+    total, initialized = db.execute(query).one()
+    if initialized:
+        return int(total)
+    if db.info.get("replica"):
+        # Réplica é somente leitura: conta sem inicializar o contador
+        return filtered(db, model, [])
+    # Numa conexão própria: não faz commit na sessão da requisição
+    with db.get_bind().connect() as connection:
+        connection.execute(_base(model))
+        connection.commit()
+    return int(db.execute(query).one()[0])
+
+def recount(db : Session, model : Base):
+    # Reconstrói o contador a partir da tabela (ex.: após cargas feitas fora da aplicação)
+    db.execute(_base(model))
+    db.commit()
+
+def approximate(db : Session, model : Base, filters : List[Any] = ()) -> int:
+    if not filters:
+        total = db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tabela)"),
+                          { 'tabela': model.__tablename__ })
+        # -1 (ou ausente): tabela ainda não analisada pelo autovacuum
+        return total if total is not None and total >= 0 else exact(db, model)
+    try:
+        sql = str(select(model.id).where(*filters).compile(db.get_bind(), compile_kwargs={ 'literal_binds': True }))
+    except CompileError:
+        return filtered(db, model, filters)
+    plan = db.scalar(text("EXPLAIN (FORMAT JSON) " + sql))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def filtered(db : Session, model : Base, filters : List[Any]) -> int:
+    return db.scalar(select(func.count(model.id)).where(*filters))
+
+def count(db : Session, model : Base, contagem : str, filters : List[Any] = ()) -> int:
+    if contagem == 'aproximada':
+        return approximate(db, model, filters)
+    return filtered(db, model, filters) if filters else exact(db, model)
@@ -1,25 +1,86 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, and_, any_, func, inspect, insert, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.concurrency import run_in_threadpool
+from auth import password_handler
 import exceptions
-import bcrypt, models, schemas
-from pydantic import BaseModel
-from database import Base
-from typing import List, Any
+import models, schemas, pagination, projection, serializers, tag_index, cache, counters, etag
+import re
+from functools import partial
+from decouple import config
+from pydantic import BaseModel, ValidationError
+from database import Base, DBSession
+from typing import List, Any, Callable, Optional, Tuple
+
+# Itens por requisição nas rotas /bulk; arquivos maiores vão pela importação
+BULK_MAX_ITEMS = config("bulk_max_items", default=1000, cast=int)
+
+def loader_options(model : Base, schema : BaseModel) -> Tuple[Any, ...]:
+    # As estratégias de carga seguem o schema de resposta: cada relacionamento
+    # serializado é carregado junto (joined para N:1, selectin para coleções).
+    return tuple(_loader_options(model, schema))
+
+def _loader_options(model : Base, schema : BaseModel, parent : Any = None):
+    relationships = inspect(model).relationships
+    for name, field in schema.__fields__.items():
+        nested = field.type_
+        if name not in relationships or not (isinstance(nested, type) and issubclass(nested, BaseModel)):
+            continue
+        relationship = relationships[name]
+        strategy = selectinload if relationship.uselist else joinedload
+        attribute = getattr(model, name)
+        loader = strategy(attribute) if parent is None else getattr(parent, strategy.__name__)(attribute)
+        children = list(_loader_options(relationship.mapper.class_, nested, loader))
+        if children:
+            yield from children
+        else:
+            yield loader
 
 class CRUD:
-    ...
+    @staticmethod
+    def validate(db : Session, schema : BaseModel, id : Optional[int] = None) -> None:
+        # Checagens baratas (existência, unicidade) feitas antes do prepare
+        return
+
+    @staticmethod
+    async def prepare(schema : BaseModel, update : bool = False) -> BaseModel:
+        # Trabalho caro feito fora da sessão antes da escrita (ex.: hash de senha)
+        return schema
 
 class BaseCRUD(CRUD):
     @staticmethod
-    def get(db : Session, id : int, model : Base, exception : exceptions.NotFoundException) -> Any:
-        entity = db.query(model).get(id)
+    def get(db : Session, id : int, model : Base, exception : exceptions.NotFoundException, options : Tuple[Any, ...] = ()) -> Any:
+        entity = db.get(model, id, options=options)
         if entity is None:
             raise exception
         return entity
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int, model : Base) -> List[Any]:
-        return db.query(model).offset(offset).limit(limit).all()
-    
+    def get_all(db : Session, offset : int, limit : int, model : Base, cursor : Optional[str] = None, options : Tuple[Any, ...] = (),
+                filters : List[Any] = (), order : Tuple[str, bool] = ('id', False)) -> Tuple[List[Any], Optional[str]]:
+        # Com cursor a busca parte da última chave vista (keyset), sem descartar linhas com offset.
+        # A chave é (campo de ordenação, id), o que mantém a ordem estável com valores repetidos.
+        key, descending = order
+        keys = [ 'id' ] if key == 'id' else [ key, 'id' ]
+        sort = f"-{key}" if descending else key
+        columns = [ getattr(model, name) for name in keys ]
+        query = db.query(model).options(*options).filter(*filters).order_by(*[ column.desc() if descending else column for column in columns ])
+        if cursor is not None:
+            values = pagination.decode_cursor(cursor, sort, [ column.type.python_type for column in columns ])
+            query = query.filter(tuple_(*columns) < tuple_(*values) if descending else tuple_(*columns) > tuple_(*values))
+        else:
+            query = query.offset(offset)
+        data = query.limit(limit).all()
+        return data, pagination.next_cursor(data, limit, sort, keys)
+
+    @staticmethod
+    def stream(db : Session, model : Base, batch_size : int, options : Tuple[Any, ...] = ()):
+        # Cursor do lado do servidor: as linhas chegam em lotes de batch_size
+        return db.query(model).options(*options).order_by(model.id).yield_per(batch_size)
+
     @staticmethod
     def create(db : Session, schema : BaseModel, model : Base, entity : Any = None) -> Any:
         if entity is None:
@@ -43,19 +104,257 @@ class BaseCRUD(CRUD):
         db.commit()
         return
 
+    @staticmethod
+    def existing_ids(db : Session, model : Base, ids : List[int]) -> set:
+        ids = set(ids)
+        if not ids:
+            return set()
+        return { id for (id,) in db.query(model.id).filter(model.id.in_(ids)) }
+
+    @staticmethod
+    def create_bulk(db : Session, model : Base, items : List[BaseModel], references : List[Tuple[str, Base, type]] = (),
+                    check : Optional[Callable] = None, to_row : Optional[Callable] = None) -> Tuple[List[Tuple[int, Any, int]], List[schemas.BulkItemError]]:
+        # Uma consulta IN por tabela referenciada e um único INSERT multi-linha;
+        # itens inválidos viram erros por índice em vez de abortar o lote.
+        # Não faz commit: o chamador pode inserir dependências na mesma transação.
+        existing = [ (field, BaseCRUD.existing_ids(db, ref_model, [ getattr(item, field) for item in items ]), exception)
+                     for field, ref_model, exception in references ]
+        accepted, errors = [], []
+        for index, item in enumerate(items):
+            exception = next((exception for field, ids, exception in existing if getattr(item, field) not in ids), None)
+            if exception is None and check is not None:
+                exception = check(item)
+            if exception is not None:
+                errors.append(schemas.BulkItemError(index=index, detail=exception().detail))
+            else:
+                accepted.append((index, item))
+        ids = []
+        if accepted:
+            rows = [ to_row(item) if to_row is not None else item.dict() for _, item in accepted ]
+            ids = db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+            counters.add(db, model, len(ids))
+        return [ (index, item, id) for (index, item), id in zip(accepted, ids) ], errors
+
+    @staticmethod
+    def bulk_result(created : List[Tuple[int, Any, int]], errors : List[schemas.BulkItemError]) -> schemas.BulkResult:
+        return schemas.BulkResult(
+            created=[ schemas.BulkItemCreated(index=index, id=id) for index, _, id in created ],
+            errors=errors
+        )
 
+class AsyncBaseCRUD(CRUD):
+    # As operações dos CRUDs são escritas sobre a Session síncrona. Com AsyncSession elas
+    # rodam via run_sync (I/O assíncrono pelo driver); no modo síncrono, no threadpool.
+    @staticmethod
+    async def run(db : DBSession, function : Callable, *args) -> Any:
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(function, *args)
+        return await run_in_threadpool(function, db, *args)
+
+    @staticmethod
+    async def get(db : DBSession, entity_class : CRUD, id : int, options : Optional[Tuple[Any, ...]] = None) -> Any:
+        if options is None:
+            return await AsyncBaseCRUD.run(db, entity_class.get, id)
+        return await AsyncBaseCRUD.run(db, partial(entity_class.get, options=options), id)
+
+    @staticmethod
+    async def serialize(db : DBSession, entity : Any, serializer : Callable) -> Any:
+        # Depois de commit/refresh os relacionamentos voltam a ser lazy; serializar
+        # dentro da sessão permite carregá-los também com AsyncSession
+        return await AsyncBaseCRUD.run(db, lambda _: serializer(entity))
+
+    @staticmethod
+    async def get_serialized(db : DBSession, entity_class : CRUD, id : int, schema : BaseModel,
+                             if_none_match : Optional[str] = None) -> Tuple[str, Optional[bytes]]:
+        # Read-through: a resposta serializada fica no cache (precedida do ETag) junto
+        # das entidades que ela embute, para ser invalidada quando qualquer uma mudar.
+        # Sem corpo (None) quando o ETag bate com o If-None-Match.
+        resource = entity_class.__name__
+        if (cached := await cache.entity_cache.get(resource, id)) is not None:
+            tag, body = cached.split(b'\n', 1)
+            return tag.decode('utf8'), body
+        entity = await AsyncBaseCRUD.get(db, entity_class, id)
+        tree = projection.full(schema)
+        tag = etag.make_etag([ entity ], tree)
+        if etag.matches(if_none_match, tag, weak=True):
+            return tag, None
+        body = serializers.dumps(serializers.for_schema(schema)(entity))
+        await cache.entity_cache.set(resource, id, tag.encode('utf8') + b'\n' + body, cache.dependencies(entity, tree))
+        return tag, body
+
+    @staticmethod
+    async def get_all(db : DBSession, entity_class : CRUD, offset : int, limit : int, cursor : Optional[str] = None,
+                      filtros : Optional[BaseModel] = None, options : Optional[Tuple[Any, ...]] = None) -> Tuple[List[Any], Optional[str]]:
+        get_all = entity_class.get_all if options is None else partial(entity_class.get_all, options=options)
+        if filtros is None:
+            return await AsyncBaseCRUD.run(db, get_all, offset, limit, cursor)
+        return await AsyncBaseCRUD.run(db, get_all, offset, limit, cursor, filtros)
+
+    @staticmethod
+    async def count(db : DBSession, entity_class : CRUD, contagem : str, filtros : Optional[BaseModel] = None) -> int:
+        if contagem not in counters.MODES:
+            raise exceptions.InvalidCountModeError
+        if filtros is None:
+            return await AsyncBaseCRUD.run(db, entity_class.count, contagem)
+        if not any(value not in (None, []) for value in filtros.dict(exclude={ 'ordem' }).values()):
+            return await AsyncBaseCRUD.run(db, entity_class.count, contagem, filtros)
+        key = f"{entity_class.__name__}:{contagem}:{filtros.json(exclude={ 'ordem' })}"
+        if (total := await counters.filtered_cache.get(key)) is None:
+            total = await AsyncBaseCRUD.run(db, entity_class.count, contagem, filtros)
+            await counters.filtered_cache.set(key, total)
+        return total
+
+    @staticmethod
+    async def create(db : DBSession, entity_class : CRUD, schema : BaseModel) -> Any:
+        await AsyncBaseCRUD.validate(db, entity_class, schema)
+        schema = await entity_class.prepare(schema)
+        return await AsyncBaseCRUD.run(db, entity_class.create, schema)
+
+    @staticmethod
+    async def update(db : DBSession, entity_class : CRUD, id : int, schema : BaseModel,
+                     if_match : Optional[str] = None, response_schema : Optional[BaseModel] = None) -> Any:
+        await AsyncBaseCRUD.validate(db, entity_class, schema, id)
+        schema = await entity_class.prepare(schema, update=True)
+        await AsyncBaseCRUD.check_version(db, entity_class, id, if_match, response_schema)
+        entity = await AsyncBaseCRUD.write(db, entity_class.update, id, schema)
+        await cache.entity_cache.invalidate(entity_class.__name__, id)
+        return entity
 
-class Usuario(CRUD):
     @staticmethod
-    def check(db : Session, usuario : schemas.UsuarioLoginSchema):
-        db_usuario = db.query(models.Usuario).filter(models.Usuario.email == usuario.email).first()
+    async def delete(db : DBSession, entity_class : CRUD, id : int,
+                     if_match : Optional[str] = None, response_schema : Optional[BaseModel] = None) -> None:
+        await AsyncBaseCRUD.check_version(db, entity_class, id, if_match, response_schema)
+        await AsyncBaseCRUD.write(db, entity_class.delete, id)
+        await cache.entity_cache.invalidate(entity_class.__name__, id)
+
+    @staticmethod
+    async def check_version(db : DBSession, entity_class : CRUD, id : int, if_match : Optional[str], schema : Optional[BaseModel]) -> None:
+        # A entidade fica carregada na sessão; o UPDATE/DELETE seguinte inclui
+        # "WHERE versao = <lida>", então uma escrita concorrente depois daqui vira StaleDataError
+        if if_match is None or schema is None:
+            return
+        entity = await AsyncBaseCRUD.get(db, entity_class, id)
+        if not etag.matches(if_match, etag.make_etag([ entity ], projection.full(schema))):
+            raise exceptions.PreconditionFailedError
+
+    @staticmethod
+    async def write(db : DBSession, function : Callable, *args) -> Any:
+        try:
+            return await AsyncBaseCRUD.run(db, function, *args)
+        except StaleDataError:
+            await AsyncBaseCRUD.run(db, Session.rollback)
+            raise exceptions.PreconditionFailedError
+
+    @staticmethod
+    async def search(db : DBSession, entity_class : CRUD, q : str, offset : int, limit : int, prefixo : bool = True) -> List[Any]:
+        return await AsyncBaseCRUD.run(db, entity_class.search, q, offset, limit, prefixo)
+
+    @staticmethod
+    async def count_by_regiao(db : DBSession, entity_class : CRUD, cep_prefixo : str, digitos : int) -> List[schemas.RegiaoCount]:
+        return await AsyncBaseCRUD.run(db, entity_class.count_by_regiao, cep_prefixo, digitos)
+
+    @staticmethod
+    async def create_bulk(db : DBSession, entity_class : CRUD, schema : BaseModel, items : List[Any]) -> schemas.BulkResult:
+        # Cada item é validado sozinho: um item inválido vira erro com o seu índice,
+        # como nas referências inexistentes, em vez de um 422 para o lote inteiro
+        if len(items) > BULK_MAX_ITEMS:
+            raise exceptions.BulkTooLargeError
+        positions, valid, invalid = [], [], []
+        for index, item in enumerate(items):
+            try:
+                valid.append(schema.parse_obj(item))
+                positions.append(index)
+            except ValidationError:
+                invalid.append(schemas.BulkItemError(index=index, detail="DADOS_INVALIDOS"))
+        result = await AsyncBaseCRUD.run(db, entity_class.create_bulk, valid) if valid else schemas.BulkResult()
+        # Índices da lista validada de volta aos do corpo da requisição
+        for entry in result.created + result.errors:
+            entry.index = positions[entry.index]
+        result.errors = sorted(result.errors + invalid, key=lambda error: error.index)
+        return result
+
+    @staticmethod
+    async def validate(db : DBSession, entity_class : CRUD, schema : BaseModel, id : Optional[int] = None) -> None:
+        # Rejeita escritas inválidas antes do prepare e encerra a transação de leitura
+        # para não segurar a conexão enquanto o hash é calculado
+        try:
+            await AsyncBaseCRUD.run(db, entity_class.validate, schema, id)
+        finally:
+            await AsyncBaseCRUD.run(db, Session.rollback)
+
+
+
+class BaseUsuarioCRUD(CRUD):
+    # Usuario, Proprietario e Corretor são a mesma linha da tabela usuario (herança):
+    # email e cpf são únicos entre os três e a senha passa pelo mesmo hash
+    @staticmethod
+    async def check(db : DBSession, entity_class : CRUD, usuario : schemas.UsuarioLoginSchema) -> Any:
+        db_usuario = await AsyncBaseCRUD.run(db, entity_class.get_by_email, usuario.email)
         if db_usuario is None:
-            return False
-        return bcrypt.checkpw(usuario.senha.encode('utf8'), db_usuario.senha.encode('utf8'))
+            return None
+        if not await password_handler.check_password(usuario.senha, db_usuario.senha):
+            return None
+        if password_handler.needs_rehash(db_usuario.senha):
+            senha_hash = await password_handler.hash_password(usuario.senha)
+            await AsyncBaseCRUD.run(db, BaseUsuarioCRUD.set_senha, db_usuario.id, senha_hash)
+        return db_usuario
+
+    @staticmethod
+    def validate(db : Session, entity_class : CRUD, usuario : schemas.UsuarioCreate, exception : Exception, id : Optional[int] = None) -> None:
+        if id is not None:
+            entity_class.get(db, id)
+        elif Usuario.get_by_email(db, usuario.email) is not None or Usuario.get_by_cpf(db, usuario.cpf) is not None:
+            raise exception
+
+    @staticmethod
+    async def prepare(usuario : schemas.UsuarioCreate, update : bool = False) -> schemas.UsuarioCreate:
+        if not update or usuario.senha != "":
+            usuario.senha = await password_handler.hash_password(usuario.senha)
+        return usuario
+
+    @staticmethod
+    def create(db : Session, usuario : schemas.UsuarioCreate, model : Base, exception : Exception) -> Any:
+        # A unicidade já foi checada em validate; aqui só resta a corrida entre requisições
+        try:
+            return BaseCRUD.create(db, usuario, model)
+        except IntegrityError:
+            db.rollback()
+            raise exception
+
+    @staticmethod
+    def update(db : Session, entity : Any, usuario : schemas.UsuarioCreate) -> Any:
+        # A senha já chega com hash (ver prepare); vazia mantém a atual
+        usuario.senha = usuario.senha if usuario.senha != "" else entity.senha
+        return BaseCRUD.update(db, entity, usuario)
+
+    @staticmethod
+    def set_senha(db : Session, id : int, senha_hash : str) -> None:
+        # UPDATE direto, sem passar pelo version_id_col: a troca do hash no login não
+        # altera nada que a API mostre, então não deve mudar o ETag nem fazer um PUT
+        # concorrente (com If-Match lido antes do login) falhar. Se esse PUT regravar
+        # o hash antigo, a senha continua válida e o rehash se repete no próximo login.
+        db.query(models.Usuario).filter(models.Usuario.id == id).update({models.Usuario.senha: senha_hash})
+        db.commit()
+
+class Usuario(CRUD):
+    MODEL = models.Usuario
+    LOADER_OPTIONS = loader_options(models.Usuario, schemas.Usuario)
+
+    @staticmethod
+    async def check(db : DBSession, usuario : schemas.UsuarioLoginSchema):
+        return await BaseUsuarioCRUD.check(db, Usuario, usuario)
+
+    @staticmethod
+    def validate(db : Session, usuario : schemas.UsuarioCreate, id : Optional[int] = None):
+        BaseUsuarioCRUD.validate(db, Usuario, usuario, exceptions.UsuarioAlreadyExistError, id)
+
+    @staticmethod
+    async def prepare(usuario : schemas.UsuarioCreate, update : bool = False):
+        return await BaseUsuarioCRUD.prepare(usuario, update)
     
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Usuario, exceptions.UsuarioNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Usuario, exceptions.UsuarioNotFoundError, Usuario.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
     def get_by_email(db : Session, email : str):
@@ -64,28 +363,26 @@ class Usuario(CRUD):
     @staticmethod
     def get_by_cpf(db : Session, cpf : str):
         return db.query(models.Usuario).filter(models.Usuario.cpf == cpf).first()
-    
+
+    @staticmethod
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Usuario, cursor, Usuario.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Usuario, batch_size, Usuario.LOADER_OPTIONS)
+
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Usuario)
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Usuario, contagem)
 
     @staticmethod
     def create(db : Session, usuario : schemas.UsuarioCreate):
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        usuario.senha = bcrypt.hashpw(usuario.senha.encode('utf8'), bcrypt.gensalt()).decode('utf8')
-        if Usuario.get_by_email(db, usuario.email) is not None or Usuario.get_by_cpf(db, usuario.cpf) is not None:
-            raise exceptions.UsuarioAlreadyExistError
-        return BaseCRUD.create(db, usuario, models.Usuario)
+        return BaseUsuarioCRUD.create(db, usuario, models.Usuario, exceptions.UsuarioAlreadyExistError)
 
     @staticmethod
     def update(db : Session, id : int, usuario : schemas.UsuarioCreate):
-        db_usuario = Usuario.get(db, id)
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        usuario.senha = bcrypt.hashpw (
-            usuario.senha.encode('utf8'), 
-            bcrypt.gensalt()
-        ).decode('utf8') if usuario.senha != "" else db_usuario.senha
-        return BaseCRUD.update(db, db_usuario, usuario)
+        return BaseUsuarioCRUD.update(db, Usuario.get(db, id), usuario)
 
     @staticmethod
     def delete(db: Session, id: int):
@@ -94,16 +391,24 @@ class Usuario(CRUD):
         return
 
 class Proprietario(CRUD):
+    MODEL = models.Proprietario
+    LOADER_OPTIONS = loader_options(models.Proprietario, schemas.Proprietario)
+
+    @staticmethod
+    async def check(db : DBSession, proprietario : schemas.UsuarioLoginSchema):
+        return await BaseUsuarioCRUD.check(db, Proprietario, proprietario)
+
     @staticmethod
-    def check(db : Session, proprietario : schemas.UsuarioLoginSchema):
-        db_proprietario = db.query(models.Proprietario).filter(models.Proprietario.email == proprietario.email).first()
-        if db_proprietario is None:
-            return False
-        return bcrypt.checkpw(proprietario.senha.encode('utf8'), db_proprietario.senha.encode('utf8'))
+    def validate(db : Session, proprietario : schemas.ProprietarioCreate, id : Optional[int] = None):
+        BaseUsuarioCRUD.validate(db, Proprietario, proprietario, exceptions.ProprietarioAlreadyExistError, id)
+
+    @staticmethod
+    async def prepare(proprietario : schemas.ProprietarioCreate, update : bool = False):
+        return await BaseUsuarioCRUD.prepare(proprietario, update)
     
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Proprietario, exceptions.ProprietarioNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Proprietario, exceptions.ProprietarioNotFoundError, Proprietario.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
     def get_by_email(db : Session, email : str):
@@ -114,26 +419,24 @@ class Proprietario(CRUD):
         return db.query(models.Proprietario).filter(models.Proprietario.cpf == cpf).first()
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Proprietario)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Proprietario, cursor, Proprietario.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Proprietario, batch_size, Proprietario.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Proprietario, contagem)
 
     @staticmethod
     def create(db : Session, proprietario : schemas.ProprietarioCreate):
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        proprietario.senha = bcrypt.hashpw(proprietario.senha.encode('utf8'), bcrypt.gensalt()).decode('utf8')
-        if Usuario.get_by_email(db, proprietario.email) is not None or Usuario.get_by_cpf(db, proprietario.cpf) is not None:
-            raise exceptions.ProprietarioAlreadyExistError
-        return BaseCRUD.create(db, proprietario, models.Proprietario)
+        return BaseUsuarioCRUD.create(db, proprietario, models.Proprietario, exceptions.ProprietarioAlreadyExistError)
 
     @staticmethod
     def update(db : Session, id : int, proprietario : schemas.ProprietarioCreate):
-        db_proprietario = Proprietario.get(db, id)
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        proprietario.senha = bcrypt.hashpw (
-            proprietario.senha.encode('utf8'), 
-            bcrypt.gensalt()).decode('utf8'
-        ) if proprietario.senha != "" else db_proprietario.senha
-        return BaseCRUD.update(db, db_proprietario, proprietario)
+        return BaseUsuarioCRUD.update(db, Proprietario.get(db, id), proprietario)
 
     @staticmethod
     def delete(db: Session, id: int):
@@ -142,16 +445,24 @@ class Proprietario(CRUD):
         return
 
 class Corretor(CRUD):
+    MODEL = models.Corretor
+    LOADER_OPTIONS = loader_options(models.Corretor, schemas.Corretor)
+
+    @staticmethod
+    async def check(db : DBSession, corretor : schemas.UsuarioLoginSchema):
+        return await BaseUsuarioCRUD.check(db, Corretor, corretor)
+
     @staticmethod
-    def check(db : Session, corretor : schemas.UsuarioLoginSchema):
-        db_corretor = db.query(models.Corretor).filter(models.Corretor.email == corretor.email).first()
-        if db_corretor is None:
-            return False
-        return bcrypt.checkpw(corretor.senha.encode('utf8'), db_corretor.senha.encode('utf8'))
+    def validate(db : Session, corretor : schemas.CorretorCreate, id : Optional[int] = None):
+        BaseUsuarioCRUD.validate(db, Corretor, corretor, exceptions.CorretorAlreadyExistError, id)
+
+    @staticmethod
+    async def prepare(corretor : schemas.CorretorCreate, update : bool = False):
+        return await BaseUsuarioCRUD.prepare(corretor, update)
     
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Corretor, exceptions.CorretorNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Corretor, exceptions.CorretorNotFoundError, Corretor.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
     def get_by_email(db : Session, email : str):
@@ -162,26 +473,24 @@ class Corretor(CRUD):
         return db.query(models.Corretor).filter(models.Corretor.cpf == cpf).first()
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Corretor)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Corretor, cursor, Corretor.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Corretor, batch_size, Corretor.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Corretor, contagem)
 
     @staticmethod
     def create(db : Session, corretor : schemas.CorretorCreate):
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        corretor.senha = bcrypt.hashpw(corretor.senha.encode('utf8'), bcrypt.gensalt()).decode('utf8')
-        if Usuario.get_by_email(db, corretor.email) is not None or Usuario.get_by_cpf(db, corretor.cpf) is not None:
-            raise exceptions.CorretorAlreadyExistError
-        return BaseCRUD.create(db, corretor, models.Corretor)
+        return BaseUsuarioCRUD.create(db, corretor, models.Corretor, exceptions.CorretorAlreadyExistError)
 
     @staticmethod
     def update(db : Session, id : int, corretor : schemas.CorretorCreate):
-        db_corretor = Corretor.get(db, id)
-        # O parâmetro rounds do gensalt determina a complexidade. O padrão é 12.
-        corretor.senha = bcrypt.hashpw (
-            corretor.senha.encode('utf8'), 
-            bcrypt.gensalt()).decode('utf8'
-        ) if corretor.senha != "" else db_corretor.senha
-        return BaseCRUD.update(db, db_corretor, corretor)
+        return BaseUsuarioCRUD.update(db, Corretor.get(db, id), corretor)
 
     @staticmethod
     def delete(db: Session, id: int):
@@ -192,13 +501,147 @@ class Corretor(CRUD):
 
 
 class Imovel(CRUD):
-    @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Imovel, exceptions.ImovelNotFoundError)
+    MODEL = models.Imovel
+    LOADER_OPTIONS = loader_options(models.Imovel, schemas.Imovel)
+    # ordem -> (campo, decrescente); cada campo tem índice (campo, id) em models.Imovel
+    ORDENACOES = {
+        'id': ('id', False),
+        '-id': ('id', True),
+        'valor': ('valor', False),
+        '-valor': ('valor', True),
+        'tamanho': ('tamanho', False),
+        '-tamanho': ('tamanho', True)
+    }
+
+    @staticmethod
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Imovel, exceptions.ImovelNotFoundError, Imovel.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Imovel)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, filtros : Optional[schemas.ImovelFilter] = None,
+                options : Optional[Tuple[Any, ...]] = None):
+        filtros = filtros or schemas.ImovelFilter()
+        if filtros.ordem not in Imovel.ORDENACOES:
+            raise exceptions.InvalidSortError
+        key, descending = Imovel.ORDENACOES[filtros.ordem]
+        options = Imovel.LOADER_OPTIONS if options is None else options
+        if key == 'id' and (cursor is not None or offset == 0) and Imovel._only_tags(filtros):
+            tag_index.index.ensure_fresh()
+            if tag_index.index.ready:
+                after = pagination.decode_cursor(cursor, filtros.ordem, [ int ])[0] if cursor is not None else None
+                return Imovel._page_from_index(db, limit, after, descending, filtros, options)
+        return BaseCRUD.get_all(db, offset, limit, models.Imovel, cursor, options, Imovel._filters(filtros), (key, descending))
+
+    @staticmethod
+    def _page_from_index(db : Session, limit : int, after : Optional[int], descending : bool, filtros : schemas.ImovelFilter,
+                         options : Tuple[Any, ...]) -> Tuple[List[Any], Optional[str]]:
+        # Ordenado por id e filtrado só por tags: os candidatos saem do bitmap a partir
+        # do cursor, em janelas crescentes, e as tags são conferidas de novo em SQL (o
+        # índice pode estar atrasado em relação a escritas de outros workers). Janelas
+        # com candidatos removidos ou retagueados não encurtam a página: busca-se a
+        # próxima até completar `limit` ou acabarem os candidatos.
+        bitmap = tag_index.index.query(filtros.tags_all, filtros.tags_any, filtros.tags_none)
+        column = models.Imovel.id.desc() if descending else models.Imovel.id
+        data, window = [], limit + 1
+        while len(data) < limit:
+            ids = tag_index.first_ids(bitmap, window, after, descending)
+            if not ids:
+                break
+            data += db.query(models.Imovel).options(*options) \
+                .filter(models.Imovel.id == any_(literal(ids, ARRAY(Integer))), Imovel._tags_sql(filtros)) \
+                .order_by(column).limit(limit - len(data)).all()
+            if len(ids) < window:
+                break
+            after, window = ids[-1], window * 2
+        return data, pagination.next_cursor(data, limit, "-id" if descending else "id", [ 'id' ])
+
+    @staticmethod
+    def search(db : Session, q : str, offset : int, limit : int, prefixo : bool = True):
+        # Busca textual em nome/descricao (stemming em português), ordenada por relevância.
+        # Com prefixo o último termo casa por prefixo, para autocompletar.
+        termos = re.findall(r'\w+', q)
+        if not termos:
+            return []
+        tsquery = func.to_tsquery('portuguese', ' & '.join(termos) + (':*' if prefixo else ''))
+        return db.query(models.Imovel).options(*Imovel.LOADER_OPTIONS) \
+            .filter(models.Imovel.busca.op('@@')(tsquery)) \
+            .order_by(func.ts_rank_cd(models.Imovel.busca, tsquery).desc(), models.Imovel.id) \
+            .offset(offset).limit(limit).all()
+
+    @staticmethod
+    def _only_tags(filtros : schemas.ImovelFilter) -> bool:
+        other = filtros.dict(exclude={ 'ordem', 'tags_all', 'tags_any', 'tags_none' })
+        tags = filtros.tags_all or filtros.tags_any or filtros.tags_none
+        return bool(tags) and all(value in (None, []) for value in other.values())
+
+    @staticmethod
+    def _filters(filtros : schemas.ImovelFilter) -> List[Any]:
+        filters = []
+        if filtros.valor_min is not None:
+            filters.append(models.Imovel.valor >= filtros.valor_min)
+        if filtros.valor_max is not None:
+            filters.append(models.Imovel.valor <= filtros.valor_max)
+        if filtros.tipo is not None:
+            filters.append(models.Imovel.tipo == filtros.tipo)
+        if filtros.quartos_min is not None:
+            filters.append(models.Imovel.quartos >= filtros.quartos_min)
+        if filtros.banheiros_min is not None:
+            filters.append(models.Imovel.banheiros >= filtros.banheiros_min)
+        if filtros.vagas_min is not None:
+            filters.append(models.Imovel.vagas >= filtros.vagas_min)
+        if filtros.tamanho_min is not None:
+            filters.append(models.Imovel.tamanho >= filtros.tamanho_min)
+        if filtros.tamanho_max is not None:
+            filters.append(models.Imovel.tamanho <= filtros.tamanho_max)
+        if filtros.disponivel is not None:
+            filters.append(models.Imovel.disponivel == filtros.disponivel)
+        if filtros.id_proprietario is not None:
+            filters.append(models.Imovel.id_proprietario == filtros.id_proprietario)
+        if filtros.tags_all or filtros.tags_any or filtros.tags_none:
+            filters.append(Imovel._tags_filter(filtros))
+        if filtros.cep_prefixo is not None:
+            filters.append(models.Imovel.id_endereco.in_(
+                select(models.Endereco.id).where(models.Endereco.cep.like(filtros.cep_prefixo + '%'))
+            ))
+        return filters
+
+    @staticmethod
+    def _tags_filter(filtros : schemas.ImovelFilter):
+        # O bitmap só restringe os candidatos; a condição em SQL continua valendo
+        # porque o índice deste processo pode não ter visto escritas de outros workers
+        tag_index.index.ensure_fresh()
+        if tag_index.index.ready:
+            bitmap = tag_index.index.query(filtros.tags_all, filtros.tags_any, filtros.tags_none)
+            if tag_index.popcount(bitmap) <= tag_index.TAG_INDEX_MAX_IDS:
+                return and_(models.Imovel.id == any_(literal(tag_index.to_ids(bitmap), ARRAY(Integer))), Imovel._tags_sql(filtros))
+        return Imovel._tags_sql(filtros)
+
+    @staticmethod
+    def _tags_sql(filtros : schemas.ImovelFilter):
+        conditions = [ models.Imovel.tags.any(models.Tag.id == id) for id in filtros.tags_all ]
+        if filtros.tags_any:
+            conditions.append(models.Imovel.tags.any(models.Tag.id.in_(filtros.tags_any)))
+        if filtros.tags_none:
+            conditions.append(~models.Imovel.tags.any(models.Tag.id.in_(filtros.tags_none)))
+        return and_(*conditions)
+
+    @staticmethod
+    def count_by_regiao(db : Session, cep_prefixo : str, digitos : int):
+        # Contagem de imóveis por sub-região: agrupa pelos primeiros `digitos` do CEP
+        regiao = func.substr(models.Endereco.cep, 1, digitos)
+        rows = db.query(regiao, func.count(models.Imovel.id)) \
+            .join(models.Imovel, models.Imovel.id_endereco == models.Endereco.id) \
+            .filter(models.Endereco.cep.like(cep_prefixo + '%')) \
+            .group_by(regiao).order_by(regiao).all()
+        return [ schemas.RegiaoCount(prefixo=prefixo, total=total) for prefixo, total in rows ]
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Imovel, batch_size, Imovel.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str, filtros : Optional[schemas.ImovelFilter] = None):
+        return counters.count(db, models.Imovel, contagem, Imovel._filters(filtros or schemas.ImovelFilter()))
     
     @staticmethod
     def get_by_endereco_id(db : Session, id : int):
@@ -224,14 +667,52 @@ class Imovel(CRUD):
         try:
             db_imovel.proprietario = Imovel._check_member(db, imovel.id_proprietario, Proprietario, exceptions.ProprietarioNotFoundError)
             db_imovel.endereco = Imovel._check_member(db, imovel.id_endereco, Endereco, exceptions.EnderecoNotFoundError)
-            db_imovel.tags = [ Tag.get(db, id) for id in imovel.id_tags ]
+            db_imovel.tags = Imovel._get_tags(db, imovel.id_tags)
         except exceptions.NotFoundException as e:
             raise e
         
         if Imovel.get_by_endereco_id(db, imovel.id_endereco) is not None:
             raise exceptions.EnderecoAlreadyTakenError
 
-        return BaseCRUD.create(db, imovel, models.Imovel, db_imovel)
+        # Corrida entre requisições: o índice único em imovel.id_endereco decide
+        try:
+            db_imovel = BaseCRUD.create(db, imovel, models.Imovel, db_imovel)
+        except IntegrityError:
+            db.rollback()
+            raise exceptions.EnderecoAlreadyTakenError
+        tag_index.index.add_imoveis([ (db_imovel.id, imovel.id_tags) ])
+        return db_imovel
+
+    @staticmethod
+    def create_bulk(db : Session, imoveis : List[schemas.ImovelCreate]):
+        tags = BaseCRUD.existing_ids(db, models.Tag, [ id for imovel in imoveis for id in imovel.id_tags ])
+        enderecos = { imovel.id_endereco for imovel in imoveis }
+        taken = { id for (id,) in db.query(models.Imovel.id_endereco).filter(models.Imovel.id_endereco.in_(enderecos)) }
+
+        def check(imovel : schemas.ImovelCreate):
+            if any(id not in tags for id in imovel.id_tags):
+                return exceptions.TagNotFoundError
+            if imovel.id_endereco in taken:
+                return exceptions.EnderecoAlreadyTakenError
+            taken.add(imovel.id_endereco)
+            return None
+
+        created, errors = BaseCRUD.create_bulk(
+            db, models.Imovel, imoveis,
+            references=[
+                ('id_proprietario', models.Proprietario, exceptions.ProprietarioNotFoundError),
+                ('id_endereco', models.Endereco, exceptions.EnderecoNotFoundError)
+            ],
+            check=check,
+            to_row=lambda imovel: dict(imovel.dict(exclude={'id_tags'}), disponivel=True)
+        )
+        links = [ {'id_imovel': id, 'id_tag': id_tag} for _, imovel, id in created for id_tag in set(imovel.id_tags) ]
+        if links:
+            db.execute(insert(models.ImovelTag), links)
+        tag_index.notify(db, [ id for _, _, id in created ])
+        db.commit()
+        tag_index.index.add_imoveis((id, imovel.id_tags) for _, imovel, id in created)
+        return BaseCRUD.bulk_result(created, errors)
 
     @staticmethod
     def update(db : Session, id : int, imovel : schemas.ImovelCreate):
@@ -239,15 +720,23 @@ class Imovel(CRUD):
         try:
             db_imovel.proprietario = Imovel._check_member(db, imovel.id_proprietario, Proprietario, exceptions.ProprietarioNotFoundError)
             db_imovel.endereco = Imovel._check_member(db, imovel.id_endereco, Endereco, exceptions.EnderecoNotFoundError)
+            db_imovel.tags = Imovel._get_tags(db, imovel.id_tags)
         except exceptions.NotFoundException as e:
             raise e
         
-        return BaseCRUD.update(db, db_imovel, imovel)
+        try:
+            db_imovel = BaseCRUD.update(db, db_imovel, imovel)
+        except IntegrityError:
+            db.rollback()
+            raise exceptions.EnderecoAlreadyTakenError
+        tag_index.index.set_tags(db_imovel.id, imovel.id_tags)
+        return db_imovel
 
     @staticmethod
     def delete(db: Session, id: int):
         db_imovel = Imovel.get(db, id)
         BaseCRUD.delete(db, db_imovel)
+        tag_index.index.remove_imovel(id)
         return
 
     @staticmethod
@@ -257,19 +746,44 @@ class Imovel(CRUD):
         else:
             raise exception
 
+    @staticmethod
+    def _get_tags(db : Session, ids : List[int]):
+        ids = set(ids)
+        tags = db.query(models.Tag).filter(models.Tag.id.in_(ids)).all() if ids else []
+        if len(tags) != len(ids):
+            raise exceptions.TagNotFoundError
+        return tags
+
 class Tag(CRUD):
+    MODEL = models.Tag
+    LOADER_OPTIONS = loader_options(models.Tag, schemas.Tag)
+
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Tag, exceptions.TagNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Tag, exceptions.TagNotFoundError, Tag.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Tag)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Tag, cursor, Tag.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Tag, batch_size, Tag.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Tag, contagem)
 
     @staticmethod
     def create(db : Session, tag : schemas.TagCreate):
         return BaseCRUD.create(db, tag, models.Tag)
 
+    @staticmethod
+    def create_bulk(db : Session, tags : List[schemas.TagCreate]):
+        created, errors = BaseCRUD.create_bulk(db, models.Tag, tags)
+        db.commit()
+        return BaseCRUD.bulk_result(created, errors)
+
     @staticmethod
     def update(db : Session, id : int, tag : schemas.TagCreate):
         db_tag = Tag.get(db, id)
@@ -279,18 +793,30 @@ class Tag(CRUD):
     def delete(db: Session, id: int):
         db_tag = Tag.get(db, id)
         BaseCRUD.delete(db, db_tag)
+        tag_index.index.remove_tag(id)
         return
 
 
 
 class Telefone(CRUD):
+    MODEL = models.Telefone
+    LOADER_OPTIONS = loader_options(models.Telefone, schemas.Telefone)
+
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Telefone, exceptions.TelefoneNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Telefone, exceptions.TelefoneNotFoundError, Telefone.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Telefone)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Telefone, cursor, Telefone.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Telefone, batch_size, Telefone.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Telefone, contagem)
 
     @staticmethod
     def create(db : Session, telefone : schemas.TelefoneCreate):
@@ -302,6 +828,15 @@ class Telefone(CRUD):
         
         return BaseCRUD.create(db, telefone, models.Telefone, db_telefone)
 
+    @staticmethod
+    def create_bulk(db : Session, telefones : List[schemas.TelefoneCreate]):
+        created, errors = BaseCRUD.create_bulk(
+            db, models.Telefone, telefones,
+            references=[ ('id_usuario', models.Usuario, exceptions.UsuarioNotFoundError) ]
+        )
+        db.commit()
+        return BaseCRUD.bulk_result(created, errors)
+
     @staticmethod
     def update(db : Session, id : int, telefone : schemas.TelefoneCreate):
         db_telefone = Telefone.get(db, id)
@@ -326,18 +861,35 @@ class Telefone(CRUD):
             raise exception
 
 class Endereco(CRUD):
+    MODEL = models.Endereco
+    LOADER_OPTIONS = loader_options(models.Endereco, schemas.Endereco)
+
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Endereco, exceptions.EnderecoNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Endereco, exceptions.EnderecoNotFoundError, Endereco.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Endereco)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Endereco, cursor, Endereco.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Endereco, batch_size, Endereco.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Endereco, contagem)
 
     @staticmethod
     def create(db : Session, endereco : schemas.EnderecoCreate):
         return BaseCRUD.create(db, endereco, models.Endereco)
 
+    @staticmethod
+    def create_bulk(db : Session, enderecos : List[schemas.EnderecoCreate]):
+        created, errors = BaseCRUD.create_bulk(db, models.Endereco, enderecos)
+        db.commit()
+        return BaseCRUD.bulk_result(created, errors)
+
     @staticmethod
     def update(db : Session, id : int, endereco : schemas.EnderecoCreate):
         db_endereco = Endereco.get(db, id)
@@ -352,13 +904,24 @@ class Endereco(CRUD):
 
 
 class Transacao(CRUD):
+    MODEL = models.Transacao
+    LOADER_OPTIONS = loader_options(models.Transacao, schemas.Transacao)
+
     @staticmethod
-    def get(db : Session, id : int):
-        return BaseCRUD.get(db, id, models.Transacao, exceptions.TransacaoNotFoundError)
+    def get(db : Session, id : int, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get(db, id, models.Transacao, exceptions.TransacaoNotFoundError, Transacao.LOADER_OPTIONS if options is None else options)
     
     @staticmethod
-    def get_all(db : Session, offset : int, limit : int):
-        return BaseCRUD.get_all(db, offset, limit, models.Transacao)
+    def get_all(db : Session, offset : int, limit : int, cursor : Optional[str] = None, options : Optional[Tuple[Any, ...]] = None):
+        return BaseCRUD.get_all(db, offset, limit, models.Transacao, cursor, Transacao.LOADER_OPTIONS if options is None else options)
+
+    @staticmethod
+    def stream(db : Session, batch_size : int):
+        return BaseCRUD.stream(db, models.Transacao, batch_size, Transacao.LOADER_OPTIONS)
+
+    @staticmethod
+    def count(db : Session, contagem : str):
+        return counters.count(db, models.Transacao, contagem)
 
     @staticmethod
     def create(db : Session, transacao : schemas.TransacaoCreate):
@@ -371,6 +934,18 @@ class Transacao(CRUD):
         
         return BaseCRUD.create(db, transacao, models.Transacao, db_transacao)
 
+    @staticmethod
+    def create_bulk(db : Session, transacoes : List[schemas.TransacaoCreate]):
+        created, errors = BaseCRUD.create_bulk(
+            db, models.Transacao, transacoes,
+            references=[
+                ('id_corretor', models.Corretor, exceptions.CorretorNotFoundError),
+                ('id_imovel', models.Imovel, exceptions.ImovelNotFoundError)
+            ]
+        )
+        db.commit()
+        return BaseCRUD.bulk_result(created, errors)
+
     @staticmethod
     def update(db : Session, id : int, transacao : schemas.TransacaoCreate):
         db_transacao = Transacao.get(db, id)
@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any, Iterable, Iterator, Optional, Tuple
+from projection import Tree
+
+# ETags fortes derivados das colunas de versão (models.*.versao): o ETag de uma
+# resposta é o hash dos pares (id, versao) de todas as entidades serializadas
+# nela, incluindo as embutidas. Assim ele pode ser comparado sem montar o corpo.
+# A árvore é a projeção da resposta (projection.full(schema) para a completa).
+
+def versions(entity : Any, tree : Tree) -> Iterator[Tuple[str, int, int]]:
+    if entity is None:
+        return
+    yield type(entity).__name__, entity.id, getattr(entity, 'versao', 0)
+    for name, child in tree.items():
+        if child is None:
+            continue
+        value = getattr(entity, name, None)
+        for item in value if isinstance(value, list) else [ value ]:
+            yield from versions(item, child)
+
+def make_etag(entities : Iterable[Any], tree : Tree, *extra : Any) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for entity in entities:
+        for version in versions(entity, tree):
+            digest.update(repr(version).encode('utf8'))
+        digest.update(b';')
+    for value in extra:
+        digest.update(repr(value).encode('utf8'))
+    return f'"{digest.hexdigest()}"'
+
+def matches(header : Optional[str], etag : str, weak : bool = False) -> bool:
+    # If-None-Match usa comparação fraca (ignora W/); If-Match, a forte
+    if header is None:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if weak and candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -5,6 +5,61 @@ class AlreadyExistException(Exception):
     ...
 
 
+class PaginationException(Exception):
+    ...
+
+class InvalidCursorError(PaginationException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "CURSOR_INVALIDO"
+
+class InvalidSortError(PaginationException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "ORDENACAO_INVALIDA"
+
+class InvalidCountModeError(PaginationException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "CONTAGEM_INVALIDA"
+
+
+class FormatException(Exception):
+    ...
+
+class InvalidFormatError(FormatException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "FORMATO_INVALIDO"
+
+
+class BulkException(Exception):
+    ...
+
+class BulkTooLargeError(BulkException):
+    def __init__(self):
+        self.status_code = 413
+        self.detail = "LOTE_MUITO_GRANDE"
+
+
+class FieldException(Exception):
+    ...
+
+class InvalidFieldError(FieldException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "CAMPO_INVALIDO"
+
+
+class ConcurrencyException(Exception):
+    ...
+
+class PreconditionFailedError(ConcurrencyException):
+    def __init__(self):
+        self.status_code = 412
+        self.detail = "VERSAO_DIVERGENTE"
+
+
 class UsuarioException(Exception):
     ...
 
@@ -0,0 +1,43 @@
+import csv, io
+from decouple import config
+from pydantic import BaseModel
+from typing import Iterator, List
+import crud, database, serializers
+
+# Exportação completa de um recurso em uma única passada: as linhas vêm de um
+# cursor do lado do servidor (yield_per) e são enviadas em blocos de
+# EXPORT_BATCH_SIZE, sem materializar a tabela nem paginar com offset.
+
+EXPORT_BATCH_SIZE = config("export_batch_size", default=1000, cast=int)
+FORMATS = ('ndjson', 'csv')
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def scalar_fields(schema : BaseModel) -> List[str]:
+    return [ name for name, field in schema.__fields__.items()
+             if not (isinstance(field.type_, type) and issubclass(field.type_, BaseModel)) ]
+
+def export_rows(entity_class : crud.CRUD, schema : BaseModel, formato : str) -> Iterator[str]:
+    with database.SessionLocal() as db:
+        rows = entity_class.stream(db, EXPORT_BATCH_SIZE)
+        buffer = io.StringIO()
+        if formato == 'csv':
+            fields = scalar_fields(schema)
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+        else:
+            serialize = serializers.for_schema(schema)
+        for count, row in enumerate(rows, start=1):
+            if formato == 'csv':
+                writer.writerow([ getattr(row, field) for field in fields ])
+            else:
+                buffer.write(serializers.dumps(serialize(row)).decode('utf8'))
+                buffer.write('\n')
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
@@ -0,0 +1,223 @@
+import argparse, csv, io, json, sys
+from decouple import config
+from itertools import islice
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+import counters, database, exceptions, models, schemas, tag_index
+
+# Importação de imóveis (com endereço e tags) a partir de CSV ou NDJSON.
+# O arquivo é lido em blocos de IMPORT_CHUNK_SIZE linhas: cada bloco é validado,
+# tem as referências resolvidas em lote e é carregado via COPY em tabelas
+# temporárias, de onde é mesclado nas tabelas reais numa única transação.
+#
+# Colunas: id_proprietario, nome, tipo, valor, descricao, tamanho, quartos,
+# vagas, banheiros, path_foto, cep, numero e tags (nomes separados por "|" no
+# CSV, lista no NDJSON).
+
+IMPORT_CHUNK_SIZE = config("import_chunk_size", default=5000, cast=int)
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'ndjson')
+
+IMOVEL_COLUMNS = [ 'id_proprietario', 'nome', 'tipo', 'valor', 'descricao', 'tamanho', 'quartos', 'vagas', 'banheiros', 'path_foto' ]
+STAGING_COLUMNS = [ 'linha' ] + IMOVEL_COLUMNS + [ 'cep', 'numero' ]
+
+CREATE_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS importacao_imovel (
+    linha bigint NOT NULL,
+    id_imovel bigint,
+    id_endereco bigint,
+    id_proprietario integer NOT NULL,
+    nome varchar NOT NULL,
+    tipo integer NOT NULL,
+    valor double precision NOT NULL,
+    descricao varchar,
+    tamanho integer NOT NULL,
+    quartos integer NOT NULL,
+    vagas integer NOT NULL,
+    banheiros integer NOT NULL,
+    path_foto varchar,
+    cep varchar NOT NULL,
+    numero integer NOT NULL
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS importacao_imovel_tag (
+    linha bigint NOT NULL,
+    id_tag integer NOT NULL
+) ON COMMIT DELETE ROWS;
+"""
+
+# Os ids são reservados nas sequences antes do INSERT para ligar imóvel,
+# endereço e tags sem depender da ordem do RETURNING
+MERGE_STAGING = [
+    """UPDATE importacao_imovel SET
+        id_endereco = nextval(pg_get_serial_sequence('endereco', 'id')),
+        id_imovel = nextval(pg_get_serial_sequence('imovel', 'id'))""",
+    """INSERT INTO endereco (id, numero, cep)
+        SELECT id_endereco, numero, cep FROM importacao_imovel""",
+    """INSERT INTO imovel (id, id_proprietario, id_endereco, nome, tipo, valor, descricao, tamanho, quartos, vagas, banheiros, disponivel, path_foto)
+        SELECT id_imovel, id_proprietario, id_endereco, nome, tipo, valor, descricao, tamanho, quartos, vagas, banheiros, true, path_foto
+        FROM importacao_imovel""",
+    """INSERT INTO imovel_tag (id_imovel, id_tag)
+        SELECT DISTINCT i.id_imovel, t.id_tag
+        FROM importacao_imovel_tag t JOIN importacao_imovel i USING (linha)""",
+]
+
+IMPORTED_TAGS = """SELECT i.id_imovel, t.id_tag
+    FROM importacao_imovel i LEFT JOIN importacao_imovel_tag t USING (linha)"""
+
+def guess_format(filename : Optional[str]) -> str:
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+def read_rows(file : IO[str], formato : str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    if formato == 'csv':
+        for linha, row in enumerate(csv.DictReader(file), start=2):
+            row['tags'] = [ tag for tag in (row.get('tags') or '').split('|') if tag ]
+            yield linha, row
+    else:
+        for linha, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield linha, row if isinstance(row, dict) else None
+
+def _validate(row : Dict[str, Any]) -> Tuple[schemas.ImovelCreate, schemas.EnderecoCreate, List[str]]:
+    endereco = schemas.EnderecoCreate(cep=row.get('cep'), numero=row.get('numero'))
+    # id_endereco é definido no merge; o valor aqui só satisfaz o schema
+    imovel = schemas.ImovelCreate(**{ column: row.get(column) for column in IMOVEL_COLUMNS }, id_endereco=0)
+    tags = row.get('tags') or []
+    if not isinstance(tags, list):
+        raise ValueError
+    return imovel, endereco, [ str(tag) for tag in tags ]
+
+class Importer:
+    def __init__(self, db : Session):
+        self.db = db
+        self.tag_ids : Dict[str, int] = {}
+        self.proprietarios : set = set()
+        self.result = schemas.ImportResult()
+
+    def _error(self, linha : int, detail : str):
+        self.result.rejected += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(schemas.BulkItemError(index=linha, detail=detail))
+
+    def _resolve_tags(self, nomes : set):
+        missing = nomes - self.tag_ids.keys()
+        if missing:
+            for id, nome in self.db.query(models.Tag.id, models.Tag.nome).filter(models.Tag.nome.in_(missing)):
+                self.tag_ids.setdefault(nome, id)
+
+    def _resolve_proprietarios(self, ids : set):
+        missing = ids - self.proprietarios
+        if missing:
+            self.proprietarios.update(id for (id,) in self.db.query(models.Proprietario.id).filter(models.Proprietario.id.in_(missing)))
+
+    def _check_references(self, validated : List[tuple]) -> Tuple[List[tuple], List[Tuple[int, str]]]:
+        self._resolve_tags({ nome for *_, tags in validated for nome in tags })
+        self._resolve_proprietarios({ imovel.id_proprietario for _, imovel, _, _ in validated })
+        loaded, rejected = [], []
+        for linha, imovel, endereco, nomes in validated:
+            if imovel.id_proprietario not in self.proprietarios:
+                rejected.append((linha, exceptions.ProprietarioNotFoundError().detail))
+            elif any(nome not in self.tag_ids for nome in nomes):
+                rejected.append((linha, exceptions.TagNotFoundError().detail))
+            else:
+                loaded.append((linha, imovel, endereco, nomes))
+        return loaded, rejected
+
+    def load_chunk(self, chunk : List[Tuple[int, Optional[Dict[str, Any]]]]):
+        validated, invalid = [], []
+        for linha, row in chunk:
+            if row is None:
+                invalid.append((linha, "LINHA_INVALIDA"))
+                continue
+            try:
+                validated.append((linha, *_validate(row)))
+            except (ValidationError, ValueError, TypeError):
+                invalid.append((linha, "DADOS_INVALIDOS"))
+
+        loaded, rejected = self._check_references(validated)
+        try:
+            imported_tags = self._write(loaded)
+        except IntegrityError:
+            # Proprietário ou tag removidos depois de resolvidos (em um bloco anterior ou
+            # durante este): os blocos já gravados ficam, este é resolvido de novo e
+            # tentado mais uma vez; se falhar outra vez, as suas linhas são rejeitadas
+            self.db.rollback()
+            self.tag_ids.clear()
+            self.proprietarios.clear()
+            loaded, rejected = self._check_references(validated)
+            try:
+                imported_tags = self._write(loaded)
+            except IntegrityError:
+                self.db.rollback()
+                rejected += [ (linha, "CONFLITO_NA_GRAVACAO") for linha, *_ in loaded ]
+                loaded, imported_tags = [], {}
+
+        for linha, detail in sorted(invalid + rejected):
+            self._error(linha, detail)
+        tag_index.index.add_imoveis(imported_tags.items())
+        self.result.imported += len(loaded)
+
+    def _write(self, loaded : List[tuple]) -> Dict[int, set]:
+        imported_tags = self._copy(loaded) if loaded else {}
+        tag_index.notify(self.db, imported_tags.keys())
+        self.db.commit()
+        return imported_tags
+
+    def _copy(self, loaded : List[tuple]) -> Dict[int, set]:
+        imoveis, tags = io.StringIO(), io.StringIO()
+        imoveis_writer, tags_writer = csv.writer(imoveis), csv.writer(tags)
+        for linha, imovel, endereco, nomes in loaded:
+            imoveis_writer.writerow([ linha ] + [ getattr(imovel, column) for column in IMOVEL_COLUMNS ] + [ endereco.cep, endereco.numero ])
+            tags_writer.writerows([ linha, self.tag_ids[nome] ] for nome in set(nomes))
+        self.db.execute(text(CREATE_STAGING))
+        imoveis.seek(0)
+        tags.seek(0)
+        with self.db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY importacao_imovel ({', '.join(STAGING_COLUMNS)}) FROM STDIN "
+                "WITH (FORMAT csv, FORCE_NOT_NULL (nome, descricao, path_foto, cep))",
+                imoveis
+            )
+            cursor.copy_expert("COPY importacao_imovel_tag (linha, id_tag) FROM STDIN WITH (FORMAT csv)", tags)
+        for statement in MERGE_STAGING:
+            self.db.execute(text(statement))
+        imported_tags = {}
+        for id_imovel, id_tag in self.db.execute(text(IMPORTED_TAGS)):
+            imported_tags.setdefault(id_imovel, set())
+            if id_tag is not None:
+                imported_tags[id_imovel].add(id_tag)
+        counters.add(self.db, models.Endereco, len(imported_tags))
+        counters.add(self.db, models.Imovel, len(imported_tags))
+        return imported_tags
+
+def import_file(file : IO, formato : str, chunk_size : int = IMPORT_CHUNK_SIZE) -> schemas.ImportResult:
+    if formato not in FORMATS:
+        raise exceptions.InvalidFormatError
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding='utf-8', newline='')
+    rows = read_rows(file, formato)
+    with database.SessionLocal() as db:
+        importer = Importer(db)
+        while chunk := list(islice(rows, chunk_size)):
+            importer.load_chunk(chunk)
+        return importer.result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa imóveis de um arquivo CSV ou NDJSON.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    with open(args.arquivo, encoding='utf-8', newline='') as file:
+        result = import_file(file, args.format or guess_format(args.arquivo), args.chunk_size)
+    print(result.json(indent=2))
+    sys.exit(0 if result.rejected == 0 else 1)
@@ -0,0 +1,107 @@
+import argparse, sys
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from typing import List, Set, Tuple
+from database import engine
+import models
+
+# Confere o banco contra os modelos e as estatísticas do Postgres:
+#  - chaves estrangeiras (models.py) sem índice que comece pela coluna;
+#  - índices declarados nos modelos que não existem no banco (migrate.py pendente);
+#  - tabelas com muitas varreduras sequenciais grandes (pg_stat_user_tables);
+#  - comandos mais caros que tocam essas tabelas (pg_stat_statements, se instalado);
+#  - índices nunca usados desde o último reset das estatísticas.
+# Sai com código 1 se encontrar chave estrangeira sem índice ou índice faltando.
+MIN_ROWS = 10_000
+TOP_STATEMENTS = 10
+
+LEADING_COLUMNS = """
+SELECT t.relname, a.attname FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+WHERE i.indisvalid AND n.nspname = current_schema()"""
+
+EXISTING_INDEXES = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+
+SEQUENTIAL_SCANS = """
+SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0), n_live_tup
+FROM pg_stat_user_tables
+WHERE n_live_tup >= :min_rows AND seq_scan > 0 AND seq_tup_read / seq_scan >= :min_rows
+ORDER BY seq_tup_read DESC"""
+
+UNUSED_INDEXES = """
+SELECT s.relname, s.indexrelname, pg_relation_size(s.indexrelid)
+FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid
+WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary
+ORDER BY pg_relation_size(s.indexrelid) DESC"""
+
+def missing_foreign_key_indexes(connection : Connection) -> List[Tuple[str, str]]:
+    covered = set(connection.execute(text(LEADING_COLUMNS)).all())
+    missing = []
+    for table in models.Base.metadata.sorted_tables:
+        for foreign_key in table.foreign_keys:
+            if (table.name, foreign_key.parent.name) not in covered:
+                missing.append((table.name, foreign_key.parent.name))
+    return sorted(set(missing))
+
+def missing_model_indexes(connection : Connection) -> List[Tuple[str, str]]:
+    existing : Set[str] = set(connection.scalars(text(EXISTING_INDEXES)))
+    return sorted((table.name, index.name) for table in models.Base.metadata.sorted_tables
+                  for index in table.indexes if index.name not in existing)
+
+def sequential_scans(connection : Connection, min_rows : int = MIN_ROWS) -> List[Tuple]:
+    return connection.execute(text(SEQUENTIAL_SCANS), { "min_rows": min_rows }).all()
+
+def expensive_statements(connection : Connection, tables : List[str], limit : int = TOP_STATEMENTS) -> List[Tuple]:
+    if not tables or not connection.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements')")):
+        return []
+    # total_exec_time a partir do Postgres 13; antes, total_time
+    column = "total_exec_time" if connection.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'pg_stat_statements' AND column_name = 'total_exec_time')"
+    )) else "total_time"
+    pattern = '|'.join(rf'\m{table}\M' for table in tables)
+    return connection.execute(text(
+        f"SELECT calls, {column}, {column} / calls, query FROM pg_stat_statements "
+        f"WHERE query ~* :pattern AND query !~* '^\\s*(EXPLAIN|COPY|CREATE|ALTER)' ORDER BY {column} DESC LIMIT :limit"
+    ), { "pattern": pattern, "limit": limit }).all()
+
+def unused_indexes(connection : Connection) -> List[Tuple]:
+    return connection.execute(text(UNUSED_INDEXES)).all()
+
+def report(min_rows : int = MIN_ROWS) -> Tuple[str, bool]:
+    lines, problems = [], False
+    with engine.connect() as connection:
+        missing = missing_foreign_key_indexes(connection)
+        if missing:
+            problems = True
+            lines.append("Chaves estrangeiras sem índice:")
+            lines += [ f"  {table}.{column}" for table, column in missing ]
+        declared = missing_model_indexes(connection)
+        if declared:
+            problems = True
+            lines.append("Índices dos modelos ausentes no banco (rode migrate.py):")
+            lines += [ f"  {table}: {index}" for table, index in declared ]
+        scans = sequential_scans(connection, min_rows)
+        if scans:
+            lines.append(f"Tabelas com varreduras sequenciais de {min_rows}+ linhas em média:")
+            lines += [ f"  {table}: {seq_scan} seq scans ({seq_read // seq_scan} linhas/scan), {idx_scan} index scans, {live} linhas"
+                       for table, seq_scan, seq_read, idx_scan, live in scans ]
+            statements = expensive_statements(connection, [ row[0] for row in scans ])
+            if statements:
+                lines.append("Comandos mais caros nessas tabelas (pg_stat_statements):")
+                lines += [ f"  {calls} chamadas, {total:.0f} ms no total, {mean:.1f} ms em média: {' '.join(query.split())[:200]}"
+                           for calls, total, mean, query in statements ]
+        unused = unused_indexes(connection)
+        if unused:
+            lines.append("Índices nunca usados desde o último reset das estatísticas:")
+            lines += [ f"  {table}: {index} ({size // 1024} kB)" for table, index, size in unused ]
+    return '\n'.join(lines) or "Nada a apontar.", problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aponta índices faltando a partir dos modelos e das estatísticas do Postgres.")
+    parser.add_argument("--min-rows", type=int, default=MIN_ROWS, help="tamanho mínimo de tabela e de varredura a considerar")
+    args = parser.parse_args()
+    text_report, problems = report(args.min_rows)
+    print(text_report)
+    sys.exit(1 if problems else 0)
@@ -1,66 +1,242 @@
-from fastapi import FastAPI, Depends, HTTPException, Body
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+import asyncio, logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Body, File, Header, Query, UploadFile
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, List, Optional
 from exceptions import *
-from database import get_db, engine
+from database import get_db, get_read_db, pool_status, DBSession
 from auth.auth_handler import signJWT
 from auth.auth_bearer import JWTBearer
-import crud, models, schemas
-
-models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+from auth import auth_handler, password_handler
+import crud, database, etag, exporter, importer, metrics, models, profiler, projection, schemas, serializers, tag_index
+
+logger = logging.getLogger(__name__)
+
+# O schema é criado/atualizado pelo migrate.py, uma vez por deploy, e não por
+# cada worker. A subida não depende do banco: um banco fora do ar só deixa o
+# /health/ready em 503 até voltar.
+@asynccontextmanager
+async def lifespan(app : FastAPI):
+    try:
+        await asyncio.wait_for(database.warm_up(), database.DB_HEALTH_TIMEOUT * 2)
+    except Exception as error:
+        logger.warning("Pool não pré-aquecido: %r", error)
+    tag_index.index.ensure_fresh()
+    yield
+    password_handler.shutdown()
+    await database.dispose()
+
+app = FastAPI(default_response_class=serializers.FastJSONResponse, lifespan=lifespan)
+
+if database.DATABASE_REPLICA_URLS:
+    app.add_middleware(database.ReadYourWritesMiddleware)
+
+if metrics.METRICS_ENABLED:
+    database.on_engine(metrics.instrument)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+if profiler.SQL_PROFILER:
+    database.on_engine(profiler.instrument)
+    app.add_middleware(profiler.ProfilerMiddleware)
+
+def imovel_filtros(filtros : schemas.ImovelFilterBase = Depends(), tags_all : List[int] = Query([]),
+                   tags_any : List[int] = Query([]), tags_none : List[int] = Query([])):
+    return schemas.ImovelFilter(**filtros.dict(), tags_all=tags_all, tags_any=tags_any, tags_none=tags_none)
 
 class BaseREST:
+    # As respostas saem do ORM direto para bytes JSON pelos serializadores de
+    # serializers.py; devolver a Response pronta evita a revalidação do response_model
     @staticmethod
-    def get(id: int, entity_class: crud.CRUD, exception: Exception, db: Session = Depends(get_db)):
+    async def get(id: int, entity_class: crud.CRUD, exception: Exception, schema: schemas.BaseModel, db: DBSession = Depends(get_db),
+                  if_none_match: Optional[str] = None, fields: Optional[str] = None, include: Optional[str] = None):
         try:
-            return jsonable_encoder(entity_class.get(db, id))
-        except exception as cie:
+            if fields is None and include is None:
+                tag, body = await crud.AsyncBaseCRUD.get_serialized(db, entity_class, id, schema, if_none_match)
+            else:
+                # Resposta parcial: só as colunas e relacionamentos pedidos saem do banco
+                tree = projection.parse(schema, fields, include)
+                entity = await crud.AsyncBaseCRUD.get(db, entity_class, id, projection.loader_options(entity_class.MODEL, tree))
+                tag = etag.make_etag([ entity ], tree, fields, include)
+                body = None if etag.matches(if_none_match, tag, weak=True) else serializers.dumps(serializers.build(tree)(entity))
+        except (exception, FieldException) as cie:
             raise HTTPException(**cie.__dict__)
+        if body is None or etag.matches(if_none_match, tag, weak=True):
+            return Response(status_code=304, headers={"ETag": tag})
+        return Response(content=body, media_type="application/json", headers={"ETag": tag})
+
+    @staticmethod
+    async def get_all(entity_class: crud.CRUD, schema: schemas.BaseModel, db: DBSession = Depends(get_read_db), offset: int = 0, limit: int = 10,
+                      cursor: Optional[str] = None, filtros: Optional[schemas.BaseModel] = None, if_none_match: Optional[str] = None,
+                      contagem: Optional[str] = None, fields: Optional[str] = None, include: Optional[str] = None):
+        projected = fields is not None or include is not None
+        try:
+            tree = projection.parse(schema, fields, include)
+            options = projection.loader_options(entity_class.MODEL, tree) if projected else None
+            total = await crud.AsyncBaseCRUD.count(db, entity_class, contagem, filtros) if contagem is not None else None
+            entity, next_cursor = await crud.AsyncBaseCRUD.get_all(db, entity_class, offset, limit, cursor, filtros, options)
+        except (PaginationException, FieldException) as cie:
+            raise HTTPException(**cie.__dict__)
+        # Tudo o que entra no corpo além das entidades: limit e offset são ecoados na resposta
+        tag = etag.make_etag(entity, tree, limit, offset, next_cursor, total, fields, include)
+        if etag.matches(if_none_match, tag, weak=True):
+            return Response(status_code=304, headers={"ETag": tag})
+        serialize = serializers.build(tree) if projected else serializers.for_schema(schema)
+        response = {"limit": limit, "offset": offset, "data": [ serialize(item) for item in entity ], "next_cursor": next_cursor, "total": total}
+        return serializers.FastJSONResponse(response, headers={"ETag": tag})
+
+    @staticmethod
+    async def search(entity_class: crud.CRUD, schema: schemas.BaseModel, db: DBSession = Depends(get_read_db), q: str = "", offset: int = 0,
+                     limit: int = 10, prefixo: bool = True):
+        entity = await crud.AsyncBaseCRUD.search(db, entity_class, q, offset, limit, prefixo)
+        serialize = serializers.for_schema(schema)
+        response = {"limit": limit, "offset": offset, "data": [ serialize(item) for item in entity ]}
+        return serializers.FastJSONResponse(response)
 
     @staticmethod
-    def get_all(entity_class: crud.CRUD, db: Session = Depends(get_db), offset: int = 0, limit: int = 10):
-        entity = entity_class.get_all(db, offset, limit)
-        response = {"limit": limit, "offset": offset, "data": entity}
-        return response
+    async def count_by_regiao(entity_class: crud.CRUD, db: DBSession = Depends(get_read_db), cep_prefixo: str = "", digitos: int = 5):
+        return await crud.AsyncBaseCRUD.count_by_regiao(db, entity_class, cep_prefixo, max(digitos, len(cep_prefixo)))
 
     @staticmethod
-    def create(schema: schemas.BaseModel, entity_class: crud.CRUD, exception: Exception, db: Session = Depends(get_db)):
+    async def export(entity_class: crud.CRUD, schema: schemas.BaseModel, format: str = "ndjson"):
+        if format not in exporter.FORMATS:
+            raise HTTPException(**InvalidFormatError().__dict__)
+        return StreamingResponse(
+            exporter.export_rows(entity_class, schema, format),
+            media_type=exporter.MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{entity_class.__name__.lower()}.{format}"'}
+        )
+
+    @staticmethod
+    async def create(schema: schemas.BaseModel, entity_class: crud.CRUD, exception: Exception, db: DBSession = Depends(get_db),
+                     response_schema: Optional[schemas.BaseModel] = None):
         try:
-            return jsonable_encoder(entity_class.create(db, schema))
+            entity = await crud.AsyncBaseCRUD.create(db, entity_class, schema)
         except Exception as cie:
             raise HTTPException(**cie.__dict__)
+        return serializers.FastJSONResponse(await crud.AsyncBaseCRUD.serialize(db, entity, serializers.for_schema(response_schema)))
+
+    @staticmethod
+    async def create_bulk(items: List[Any], schema: schemas.BaseModel, entity_class: crud.CRUD, db: DBSession = Depends(get_db)):
+        try:
+            return await crud.AsyncBaseCRUD.create_bulk(db, entity_class, schema, items)
+        except BulkException as cie:
+            raise HTTPException(**cie.__dict__)
 
     @staticmethod
-    def update(id: int, schema: schemas.BaseModel, entity_class: crud.CRUD, exception: Exception, db: Session = Depends(get_db)):
+    async def update(id: int, schema: schemas.BaseModel, entity_class: crud.CRUD, exception: Exception, db: DBSession = Depends(get_db),
+                     if_match: Optional[str] = None, response_schema: Optional[schemas.BaseModel] = None):
         try:
-            return jsonable_encoder(entity_class.update(db, id, schema))
-        except exception as cie:
+            entity = await crud.AsyncBaseCRUD.update(db, entity_class, id, schema, if_match, response_schema)
+        except (exception, ConcurrencyException) as cie:
             raise HTTPException(**cie.__dict__)
+        return serializers.FastJSONResponse(await crud.AsyncBaseCRUD.serialize(db, entity, serializers.for_schema(response_schema)))
 
     @staticmethod
-    def delete(id: int, entity_class: crud.CRUD, exception: Exception, db: Session = Depends(get_db)):
+    async def delete(id: int, entity_class: crud.CRUD, exception: Exception, db: DBSession = Depends(get_db),
+                     if_match: Optional[str] = None, response_schema: Optional[schemas.BaseModel] = None):
         try:
-            return jsonable_encoder(entity_class.delete(db, id))
-        except exception as cie:
+            await crud.AsyncBaseCRUD.delete(db, entity_class, id, if_match, response_schema)
+        except (exception, ConcurrencyException) as cie:
             raise HTTPException(**cie.__dict__)
+        return serializers.FastJSONResponse(None)
+
+def documented(model : Any) -> dict:
+    # Os handlers devolvem a Response pronta (ver BaseREST), então as rotas usam
+    # response_model=None para não revalidar; o schema fica só na documentação
+    return { 200: { "model": model } }
+
+def sem_filtros():
+    return None
+
+def register_routes(resource : type, bulk : bool = True, filtros : Callable = sem_filtros):
+    # Rotas padrão de um recurso, a partir das constantes da sua classe. As rotas
+    # próprias do recurso são declaradas no corpo da classe e, registradas antes,
+    # têm precedência sobre /{id}.
+    api_string, entity_class, exception = resource.API_STRING, resource.ENTITY_CLASS, resource.EXCEPTION_TYPE
+    schema, create_schema = resource.DEFAULT_RESPONSE_MODEL, resource.CREATE_SCHEMA
+
+    @app.get(f"{api_string}export")
+    async def export(format : str = "ndjson", principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.export(entity_class, schema, format)
+
+    @app.get(f"{api_string}{{id}}", response_model=None, responses=documented(schema))
+    async def get(id : int, db : DBSession = Depends(get_db), if_none_match : Optional[str] = Header(None), fields : Optional[str] = None,
+                  include : Optional[str] = None, principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.get(id, entity_class, exception, schema, db, if_none_match, fields, include)
+
+    @app.get(api_string, response_model=None, responses=documented(resource.PAGINATED_RESPONSE_MODEL))
+    async def get_all(db : DBSession = Depends(get_read_db), offset : int = 0, limit : int = 10, cursor : Optional[str] = None,
+                      filtros : Optional[schemas.BaseModel] = Depends(filtros), contagem : Optional[str] = None, fields : Optional[str] = None,
+                      include : Optional[str] = None, if_none_match : Optional[str] = Header(None),
+                      principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.get_all(entity_class, schema, db, offset, limit, cursor, filtros, if_none_match, contagem, fields, include)
+
+    @app.post(api_string, response_model=None, responses=documented(schema))
+    async def create(item : create_schema, db : DBSession = Depends(get_db), principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.create(item, entity_class, exception, db, schema)
+
+    if bulk:
+        @app.post(f"{api_string}bulk", response_model=schemas.BulkResult)
+        async def create_bulk(items : List[Any] = Body(...), db : DBSession = Depends(get_db),
+                              principal : schemas.Principal = Depends(JWTBearer())):
+            return await BaseREST.create_bulk(items, create_schema, entity_class, db)
+
+    @app.put(f"{api_string}{{id}}", response_model=None, responses=documented(schema))
+    async def update(id : int, item : create_schema, db : DBSession = Depends(get_db), if_match : Optional[str] = Header(None),
+                     principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.update(id, item, entity_class, exception, db, if_match, schema)
+
+    @app.delete(f"{api_string}{{id}}", response_model=None)
+    async def delete(id : int, db : DBSession = Depends(get_db), if_match : Optional[str] = Header(None),
+                     principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.delete(id, entity_class, exception, db, if_match, schema)
 
 # cadastro e login
 class Signup:
     @app.post("/api/signup", tags=["usuario"])
-    async def usuario_signup(usuario: schemas.UsuarioCreate = Body(...), db: Session = Depends(get_db)):
+    async def usuario_signup(usuario: schemas.UsuarioCreate = Body(...), db: DBSession = Depends(get_db)):
         try:
-            crud.Usuario.create(db, usuario)
-            return signJWT(usuario.email)
+            db_usuario = await crud.AsyncBaseCRUD.create(db, crud.Usuario, usuario)
+            return signJWT(db_usuario.id, db_usuario.email, db_usuario.tipo)
         except UsuarioException as cie:
             raise HTTPException(**cie.__dict__)
         
     @app.post("/api/login", tags=["usuario"])
-    async def usuario_login(usuario: schemas.UsuarioLoginSchema = Body(...), db: Session = Depends(get_db)):
-        if crud.Usuario.check(db, usuario):
-            return signJWT(usuario.email)
+    async def usuario_login(usuario: schemas.UsuarioLoginSchema = Body(...), db: DBSession = Depends(get_db)):
+        if (db_usuario := await crud.Usuario.check(db, usuario)) is not None:
+            return signJWT(db_usuario.id, db_usuario.email, db_usuario.tipo)
         raise HTTPException(status_code=400, detail="USUARIO_INCORRETO")
 
+# monitoramento
+class Monitoramento:
+    @app.get("/api/db/pool", tags=["monitoramento"])
+    async def get_pool_status(principal : schemas.Principal = Depends(JWTBearer())):
+        # Conexões em uso, overflow e espera no checkout de cada engine
+        return pool_status()
+
+# saúde (sem autenticação, para o orquestrador/balanceador)
+class Saude:
+    @app.get("/health/live", tags=["monitoramento"])
+    async def live():
+        # O processo responde; não depende do banco, para não reiniciar workers por causa dele
+        return { "status": "ok" }
+
+    @app.get("/health/ready", tags=["monitoramento"])
+    async def ready():
+        checks = { "banco": await database.ping() }
+        try:
+            auth_handler.jwt_settings()
+            checks["auth"] = True
+        except Exception:
+            checks["auth"] = False
+        ok = all(checks.values())
+        return serializers.FastJSONResponse({ "status": "ok" if ok else "indisponivel", **checks }, status_code=200 if ok else 503)
+
 # usuario
 class Usuario:
     API_STRING = '/api/usuarios/'
@@ -70,25 +246,7 @@ class Usuario:
     EXCEPTION_TYPE = UsuarioException
     CREATE_SCHEMA = schemas.UsuarioCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
+register_routes(Usuario, bulk=False)
 
 # Proprietario
 class Proprietario:
@@ -99,25 +257,7 @@ class Proprietario:
     EXCEPTION_TYPE = ProprietarioException
     CREATE_SCHEMA = schemas.ProprietarioCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
+register_routes(Proprietario, bulk=False)
 
 # Corretor
 class Corretor:
@@ -128,27 +268,7 @@ class Corretor:
     EXCEPTION_TYPE = CorretorException
     CREATE_SCHEMA = schemas.CorretorCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
-
-
+register_routes(Corretor, bulk=False)
 
 # Imovel
 class Imovel:
@@ -159,25 +279,25 @@ class Imovel:
     EXCEPTION_TYPE = ImovelException
     CREATE_SCHEMA = schemas.ImovelCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
+    @app.get(f"{API_STRING}search", response_model=None, responses=documented(PAGINATED_RESPONSE_MODEL))
+    async def search(q : str, db : DBSession = Depends(get_read_db), offset : int = 0, limit : int = 10, prefixo : bool = True,
+                     principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.search(crud.Imovel, schemas.Imovel, db, q, offset, limit, prefixo)
 
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
+    @app.get(f"{API_STRING}regioes", response_model=List[schemas.RegiaoCount])
+    async def count_by_regiao(cep_prefixo : str = Query(..., regex=r'^[0-9]{1,8}$'), digitos : int = Query(5, ge=1, le=8),
+                              db : DBSession = Depends(get_read_db), principal : schemas.Principal = Depends(JWTBearer())):
+        return await BaseREST.count_by_regiao(crud.Imovel, db, cep_prefixo, digitos)
 
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
+    @app.post(f"{API_STRING}import", response_model=schemas.ImportResult)
+    async def import_file(arquivo : UploadFile = File(...), format : Optional[str] = None,
+                          principal : schemas.Principal = Depends(JWTBearer())):
+        try:
+            return await run_in_threadpool(importer.import_file, arquivo.file, format or importer.guess_format(arquivo.filename))
+        except FormatException as cie:
+            raise HTTPException(**cie.__dict__)
 
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
+register_routes(Imovel, filtros=imovel_filtros)
 
 # Tag
 class Tag:
@@ -188,27 +308,7 @@ class Tag:
     EXCEPTION_TYPE = TagException
     CREATE_SCHEMA = schemas.TagCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
-
-
+register_routes(Tag)
 
 # Telefone
 class Telefone:
@@ -219,26 +319,8 @@ class Telefone:
     EXCEPTION_TYPE = TelefoneException
     CREATE_SCHEMA = schemas.TelefoneCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
+register_routes(Telefone)
 
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
-    
 # Endereco
 class Endereco:
     API_STRING = '/api/enderecos/'
@@ -248,27 +330,7 @@ class Endereco:
     EXCEPTION_TYPE = EnderecoException
     CREATE_SCHEMA = schemas.EnderecoCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
-   
-
+register_routes(Endereco)
 
 # Transacao
 class Transacao:
@@ -279,23 +341,4 @@ class Transacao:
     EXCEPTION_TYPE = TransacaoException
     CREATE_SCHEMA = schemas.TransacaoCreate
 
-    @app.get(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def get(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.get(id, entity_class, exception, db)
-
-    @app.get(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=PAGINATED_RESPONSE_MODEL)
-    def get_all(entity_class=ENTITY_CLASS, db : Session = Depends(get_db), offset : int = 0, limit : int = 10):
-        return BaseREST.get_all(entity_class, db, offset, limit)
-
-    @app.post(f"{API_STRING}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def create(schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.create(schema, entity_class, exception, db)
-
-    @app.put(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())], response_model=DEFAULT_RESPONSE_MODEL)
-    def update(id : int, schema : CREATE_SCHEMA, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.update(id, schema, entity_class, exception, db)
-
-    @app.delete(f"{API_STRING}{{id}}", dependencies=[Depends(JWTBearer())])
-    def delete(id : int, entity_class=ENTITY_CLASS, exception=EXCEPTION_TYPE, db : Session = Depends(get_db)):
-        return BaseREST.delete(id, entity_class, exception, db)
-   
\ No newline at end of file
+register_routes(Transacao)
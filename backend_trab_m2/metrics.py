@@ -0,0 +1,215 @@
+import bisect, threading, time
+from contextvars import ContextVar
+from decouple import config
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Métricas no formato texto do Prometheus, servidas em /metrics. Sem dependências:
+# cada observação é um bisect e uma soma sob lock, barato o bastante para ficar
+# ligado em produção. Os valores são por processo (cada worker é um alvo do scrape).
+METRICS_ENABLED = config("metrics_enabled", default=True, cast=bool)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def _labels(names : Sequence[str], values : Sequence[Any]) -> str:
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+class Metric:
+    TYPE = ''
+
+    def __init__(self, name : str, help : str, labels : Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values : Dict[Tuple, Any] = {}
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [ f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}" ]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+    def _render_value(self, labels : Tuple, value : Any) -> List[str]:
+        return [ f"{self.name}{_labels(self.labels, labels)} {value}" ]
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def inc(self, *labels : Any, amount : float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def inc(self, *labels : Any, amount : float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels : Any, amount : float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value : float, *labels : Any):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name : str, help : str, labels : Sequence[str] = (), buckets : Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value : float, *labels : Any):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [ [ 0 ] * (len(self.buckets) + 1), 0.0 ]
+            state[0][index] += 1
+            state[1] += value
+
+    def _render_value(self, labels : Tuple, value : Any) -> List[str]:
+        counts, total = value[0][:], value[1]
+        lines, cumulative = [], 0
+        names = self.labels + ('le',)
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+REGISTRY : List[Metric] = []
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Duração das requisições HTTP.", ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requisições HTTP em andamento.")
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Tempo gasto em SQL por requisição.", ('method', 'route'))
+REQUEST_QUERIES = Histogram("http_request_queries", "Comandos SQL por requisição.", ('method', 'route'),
+                            buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+DB_STATEMENTS = Counter("db_statements_total", "Comandos SQL executados.")
+DB_STATEMENT_SECONDS = Counter("db_statement_seconds_total", "Tempo total em comandos SQL.")
+BCRYPT_DURATION = Histogram("bcrypt_duration_seconds", "Duração das operações de bcrypt (incluindo fila do pool).",
+                            ('operation',), buckets=BCRYPT_BUCKETS)
+
+# Acumulador [segundos, comandos] da requisição corrente; o contexto chega às
+# sessões pelo run_sync (greenlet) e pelo threadpool
+_request_db : ContextVar[Optional[List[float]]] = ContextVar("request_db", default=None)
+
+def instrument(engine : Engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+        DB_STATEMENTS.inc()
+        DB_STATEMENT_SECONDS.inc(amount=elapsed)
+        accumulator = _request_db.get()
+        if accumulator is not None:
+            accumulator[0] += elapsed
+            accumulator[1] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+def route_templates(routes : Sequence[Any]) -> Dict[Any, str]:
+    # endpoint -> caminho da rota. Endpoints registrados em mais de um caminho ficam
+    # de fora (o caminho seria ambíguo) e caem na busca pelas rotas.
+    paths : Dict[Any, set] = {}
+    for route in routes:
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is not None:
+            paths.setdefault(endpoint, set()).add(route.path)
+    return { endpoint: next(iter(candidates)) for endpoint, candidates in paths.items() if len(candidates) == 1 }
+
+def route_template(scope : Dict[str, Any], templates : Optional[Dict[Any, str]] = None) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # O Starlette 0.27 não põe a rota no scope, só o endpoint: a tabela evita
+    # testar as ~66 rotas (com regex) a cada requisição
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        # Caminhos sem rota ficam agrupados para não multiplicar as séries
+        return "<sem_rota>"
+    if templates is not None and endpoint in templates:
+        return templates[endpoint]
+    for candidate in scope["app"].router.routes:
+        if candidate.matches(scope)[0] == Match.FULL:
+            return candidate.path
+    return "<sem_rota>"
+
+class MetricsMiddleware:
+    # Middleware ASGI puro: não bufferiza o corpo (exportações em streaming seguem intactas)
+    def __init__(self, app):
+        self.app = app
+        self.templates : Optional[Dict[Any, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self.templates is None:
+            # A pilha de middlewares é montada na primeira requisição, com as rotas já registradas
+            self.templates = route_templates(scope["app"].router.routes)
+        status = 500
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        accumulator = [ 0.0, 0 ]
+        token = _request_db.set(accumulator)
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _request_db.reset(token)
+            method, route = scope["method"], route_template(scope, self.templates)
+            REQUEST_DURATION.observe(elapsed, method, route, status)
+            REQUEST_DB_TIME.observe(accumulator[0], method, route)
+            REQUEST_QUERIES.observe(accumulator[1], method, route)
+
+def _pool_lines() -> List[str]:
+    from database import pool_status
+    series = [
+        ("db_pool_size", "gauge", "size", "Conexões mantidas pelo pool."),
+        ("db_pool_checked_out", "gauge", "checked_out", "Conexões em uso."),
+        ("db_pool_overflow", "gauge", "overflow", "Conexões além do pool_size."),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Checkouts de conexão."),
+        ("db_pool_checkout_timeouts_total", "counter", "timeouts", "Checkouts que estouraram o pool_timeout."),
+        ("db_pool_checkout_wait_seconds_total", "counter", "wait_total", "Tempo total esperando por conexão."),
+        ("db_pool_checkout_wait_seconds_max", "gauge", "wait_max", "Maior espera por conexão."),
+    ]
+    status = pool_status()
+    lines = []
+    for name, kind, key, help in series:
+        lines += [ f"# HELP {name} {help}", f"# TYPE {name} {kind}" ]
+        lines += [ f"{name}{_labels(('engine',), (engine,))} {values[key]}" for engine, values in status.items() if key in values ]
+    return lines
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_pool_lines())
+    return '\n'.join(lines) + '\n'
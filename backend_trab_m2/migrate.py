@@ -0,0 +1,94 @@
+import argparse, pathlib, re, sys
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from typing import Callable, List, Set, Tuple
+from database import engine
+import models
+
+# Migrações versionadas: migrations/NNNN_descricao.sql, aplicadas em ordem e
+# registradas em schema_migrations. Um advisory lock impede que duas instâncias
+# migrem ao mesmo tempo. Antes delas, create_all cria as tabelas que ainda não
+# existem (num banco novo, tudo); as migrações levam bancos antigos ao modelo
+# atual e são idempotentes.
+#
+# Arquivos que começam com "-- sem transação" rodam comando a comando fora de
+# transação (exigido por CREATE INDEX CONCURRENTLY). Um índice que ficou
+# inválido por uma construção interrompida é removido antes da nova tentativa.
+MIGRATIONS_DIR = pathlib.Path(__file__).parent / 'migrations'
+NO_TRANSACTION = '-- sem transação'
+LOCK_ID = 2024052401
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    versao varchar PRIMARY KEY,
+    aplicada_em timestamptz NOT NULL DEFAULT now()
+)"""
+
+INVALID_INDEXES = """
+SELECT c.relname FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE NOT i.indisvalid AND n.nspname = current_schema()"""
+
+Migration = Tuple[str, pathlib.Path]
+
+def available() -> List[Migration]:
+    return sorted((path.stem, path) for path in MIGRATIONS_DIR.glob('*.sql') if re.match(r'^\d{4}_', path.name))
+
+def applied(connection : Connection) -> Set[str]:
+    return set(connection.scalars(text("SELECT versao FROM schema_migrations")))
+
+def _statements(sql : str) -> List[str]:
+    # Separação simples por ";" no fim da linha (os arquivos sem transação não têm blocos DO);
+    # comentários saem antes, para um ";" dentro deles não partir o arquivo
+    sql = re.sub(r'--.*$', '', sql, flags=re.MULTILINE)
+    return [ statement.strip() for statement in re.split(r';\s*$', sql, flags=re.MULTILINE) if statement.strip() ]
+
+def _apply(version : str, path : pathlib.Path):
+    sql = path.read_text(encoding='utf-8')
+    record = text("INSERT INTO schema_migrations (versao) VALUES (:versao)")
+    if sql.startswith(NO_TRANSACTION):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for (index,) in connection.execute(text(INVALID_INDEXES)).all():
+                connection.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{index}"')
+            for statement in _statements(sql):
+                connection.exec_driver_sql(statement)
+            connection.execute(record, { "versao": version })
+    else:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(sql)
+            connection.execute(record, { "versao": version })
+
+def migrate(log : Callable[[str], None] = print) -> List[str]:
+    # O lock de sessão fica numa conexão própria enquanto as migrações usam outras
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), { "id": LOCK_ID })
+        try:
+            lock.execute(text(CREATE_TABLE))
+            models.Base.metadata.create_all(bind=engine)
+            done = applied(lock)
+            pending = [ (version, path) for version, path in available() if version not in done ]
+            for version, path in pending:
+                log(f"aplicando {version}")
+                _apply(version, path)
+            return [ version for version, _ in pending ]
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), { "id": LOCK_ID })
+
+def status() -> List[Tuple[str, bool]]:
+    with engine.connect() as connection:
+        connection.execute(text(CREATE_TABLE))
+        connection.commit()
+        done = applied(connection)
+    return [ (version, version in done) for version, _ in available() ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica as migrações pendentes de migrations/.")
+    parser.add_argument("--status", action="store_true", help="só lista as migrações e se já foram aplicadas")
+    args = parser.parse_args()
+    if args.status:
+        for version, done in status():
+            print(f"{'[x]' if done else '[ ]'} {version}")
+        sys.exit(0)
+    versions = migrate()
+    print(f"{len(versions)} migração(ões) aplicada(s)" if versions else "banco já está atualizado")
@@ -0,0 +1,19 @@
+-- Colunas e tabela introduzidas pelos filtros/busca (imovel.busca), pelos ETags
+-- (versao em todas as entidades) e pelos totais das listagens (contador).
+ALTER TABLE usuario ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+ALTER TABLE imovel ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+ALTER TABLE tag ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+ALTER TABLE telefone ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+ALTER TABLE endereco ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+ALTER TABLE transacao ADD COLUMN IF NOT EXISTS versao integer NOT NULL DEFAULT 1;
+
+-- Reescreve a tabela imovel (coluna gerada armazenada)
+ALTER TABLE imovel ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') ||
+    setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B')
+) STORED;
+
+CREATE TABLE IF NOT EXISTS contador (
+    tabela varchar PRIMARY KEY,
+    total integer NOT NULL
+);
@@ -0,0 +1,10 @@
+-- sem transação
+-- Índices dos filtros, da busca textual e das regiões por CEP, construídos sem
+-- bloquear escritas.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_disponivel_valor ON imovel (valor, id) WHERE disponivel;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_tipo_valor ON imovel (tipo, valor, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_valor ON imovel (valor, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_tamanho ON imovel (tamanho, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_proprietario ON imovel (id_proprietario, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_busca ON imovel USING gin (busca);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_endereco_cep_prefixo ON endereco (cep varchar_pattern_ops);
@@ -0,0 +1,10 @@
+-- sem transação
+-- Chaves estrangeiras sem índice: cada relacionamento carregado, cada DELETE em
+-- cascata e cada busca por endereço varriam a tabela inteira.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transacao_corretor ON transacao (id_corretor, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transacao_imovel ON transacao (id_imovel);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_telefone_usuario ON telefone (id_usuario);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_imovel_tag_tag ON imovel_tag (id_tag, id_imovel);
+-- Um endereço por imóvel. Falha se já houver endereços repetidos:
+--   SELECT id_endereco, count(*) FROM imovel GROUP BY id_endereco HAVING count(*) > 1
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_imovel_endereco ON imovel (id_endereco);
@@ -0,0 +1,6 @@
+-- Contador dividido em slots por tabela (counters.py): inserções concorrentes
+-- atualizam linhas diferentes em vez de fazer fila na mesma, e a leitura soma
+-- os slots. O total existente fica no slot 0.
+ALTER TABLE contador ADD COLUMN IF NOT EXISTS slot integer NOT NULL DEFAULT 0;
+ALTER TABLE contador DROP CONSTRAINT IF EXISTS contador_pkey;
+ALTER TABLE contador ADD PRIMARY KEY (tabela, slot);
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Table
+from sqlalchemy import Column, Computed, ForeignKey, Index, Table, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from database import Base
 from datetime import date
@@ -14,12 +15,16 @@ class Usuario(Base):
     cpf       : Mapped[str] = mapped_column(nullable=False, unique=True, index=True)
     path_foto : Mapped[str] = mapped_column()
     tipo      : Mapped[str] = mapped_column()
+    # Contador de versão do SQLAlchemy: incrementado a cada UPDATE, que só é
+    # aplicado se a versão no banco ainda for a lida (base dos ETags)
+    versao    : Mapped[int] = mapped_column(nullable=False, server_default=text('1'))
 
     telefone : Mapped['Telefone'] = relationship(back_populates='usuario')
 
     __mapper_args__ = {
         "polymorphic_identity" : "usuario",
-        "polymorphic_on" : "tipo"
+        "polymorphic_on" : "tipo",
+        "version_id_col" : versao
     }
 
 class Proprietario(Usuario):
@@ -63,24 +68,54 @@ class Imovel(Base):
     banheiros       : Mapped[int]   = mapped_column(nullable=False)
     disponivel      : Mapped[bool]  = mapped_column(nullable=False)
     path_foto       : Mapped[str]   = mapped_column()
+    # Gerada pelo banco a cada INSERT/UPDATE; nunca é escrita pela aplicação
+    busca           : Mapped[str]   = mapped_column(TSVECTOR, Computed(
+        "setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') || "
+        "setweight(to_tsvector('portuguese', coalesce(descricao, '')), 'B')",
+        persisted=True
+    ), deferred=True)
+    versao          : Mapped[int]   = mapped_column(nullable=False, server_default=text('1'))
 
     proprietario : Mapped['Proprietario'] = relationship(back_populates='imoveis')
     endereco     : Mapped['Endereco']     = relationship(back_populates='imovel')
     tags         : Mapped[List['Tag']]    = relationship(secondary='imovel_tag', back_populates='imoveis')
     transacao    : Mapped['Transacao']    = relationship(back_populates='imovel')
 
+    __table_args__ = (
+        # Busca típica: imóveis disponíveis por faixa de valor
+        Index('ix_imovel_disponivel_valor', 'valor', 'id', postgresql_where=text('disponivel')),
+        Index('ix_imovel_tipo_valor', 'tipo', 'valor', 'id'),
+        Index('ix_imovel_valor', 'valor', 'id'),
+        Index('ix_imovel_tamanho', 'tamanho', 'id'),
+        Index('ix_imovel_proprietario', 'id_proprietario', 'id'),
+        # Um endereço por imóvel (ver crud.Imovel.create); serve também às buscas por endereço
+        Index('ux_imovel_endereco', 'id_endereco', unique=True),
+        Index('ix_imovel_busca', 'busca', postgresql_using='gin'),
+    )
+
+    __mapper_args__ = {
+        "version_id_col" : versao
+    }
+
 class Tag(Base):
     __tablename__ = 'tag'
 
-    id   : Mapped[int]  = mapped_column(primary_key=True, index=True)
-    nome : Mapped[str]  = mapped_column(nullable=False)
-    tipo : Mapped[bool] = mapped_column(nullable=False)
+    id     : Mapped[int]  = mapped_column(primary_key=True, index=True)
+    nome   : Mapped[str]  = mapped_column(nullable=False)
+    tipo   : Mapped[bool] = mapped_column(nullable=False)
+    versao : Mapped[int]  = mapped_column(nullable=False, server_default=text('1'))
 
     imoveis : Mapped[List['Imovel']] = relationship(secondary='imovel_tag', back_populates='tags')
 
+    __mapper_args__ = {
+        "version_id_col" : versao
+    }
+
 ImovelTag = Table('imovel_tag', Base.metadata, 
     Column('id_imovel', ForeignKey('imovel.id'), primary_key=True),
-    Column('id_tag', ForeignKey('tag.id'), primary_key=True)
+    Column('id_tag', ForeignKey('tag.id'), primary_key=True),
+    # A chave primária começa por id_imovel; os acessos pela tag precisam do próprio índice
+    Index('ix_imovel_tag_tag', 'id_tag', 'id_imovel')
 )
 
 
@@ -92,18 +127,37 @@ class Telefone(Base):
     id_usuario : Mapped[int] = mapped_column(ForeignKey('usuario.id'), nullable=False)
     numero     : Mapped[str] = mapped_column(nullable=False)
     tipo       : Mapped[int] = mapped_column(nullable=False)
+    versao     : Mapped[int] = mapped_column(nullable=False, server_default=text('1'))
 
     usuario : Mapped['Usuario'] = relationship(back_populates='telefone')
 
+    __table_args__ = (
+        Index('ix_telefone_usuario', 'id_usuario'),
+    )
+
+    __mapper_args__ = {
+        "version_id_col" : versao
+    }
+
 class Endereco(Base):
     __tablename__ = 'endereco'
 
     id     : Mapped[int] = mapped_column(primary_key=True, index=True)
     numero : Mapped[int] = mapped_column(nullable=False)
     cep    : Mapped[str] = mapped_column(nullable=False)
+    versao : Mapped[int] = mapped_column(nullable=False, server_default=text('1'))
 
     imovel : Mapped['Imovel'] = relationship(back_populates='endereco')
 
+    __table_args__ = (
+        # Consultas por região usam prefixo do CEP (cep LIKE '880%')
+        Index('ix_endereco_cep_prefixo', 'cep', postgresql_ops={ 'cep': 'varchar_pattern_ops' }),
+    )
+
+    __mapper_args__ = {
+        "version_id_col" : versao
+    }
+
 
 
 class Transacao(Base):
@@ -114,6 +168,26 @@ class Transacao(Base):
     id_imovel   : Mapped[int]   = mapped_column(ForeignKey('imovel.id'), nullable=False)
     data        : Mapped[date]  = mapped_column(nullable=False)
     valor_total : Mapped[float] = mapped_column(nullable=False)
+    versao      : Mapped[int]   = mapped_column(nullable=False, server_default=text('1'))
 
     corretor : Mapped['Corretor'] = relationship(back_populates='transacoes')
     imovel   : Mapped['Imovel']   = relationship(back_populates='transacao')
+
+    __table_args__ = (
+        Index('ix_transacao_corretor', 'id_corretor', 'id'),
+        Index('ix_transacao_imovel', 'id_imovel'),
+    )
+
+    __mapper_args__ = {
+        "version_id_col" : versao
+    }
+
+
+
+class Contador(Base):
+    __tablename__ = 'contador'
+
+    # Total de linhas por tabela, mantido por counters.py: a soma dos slots
+    tabela : Mapped[str] = mapped_column(primary_key=True)
+    slot   : Mapped[int] = mapped_column(primary_key=True, default=0)
+    total  : Mapped[int] = mapped_column(nullable=False)
@@ -0,0 +1,44 @@
+import base64, json
+import exceptions
+from typing import Any, List, Optional
+
+# O cursor é opaco para o cliente: guarda a ordenação e os valores da chave de
+# ordenação do último registro da página, codificados em base64. Um cursor de
+# outra ordenação, ou com valores do tipo errado para as colunas, é rejeitado.
+def encode_cursor(sort : str, values : List[Any]) -> str:
+    raw = json.dumps({ "ordem": sort, "valores": values }, separators=(',', ':'), default=str).encode('utf8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _value(value : Any, python_type : type) -> Any:
+    if isinstance(value, bool):
+        raise exceptions.InvalidCursorError
+    if python_type is float and isinstance(value, (int, float)):
+        return value
+    if isinstance(value, python_type):
+        return value
+    # Datas e afins viajam como texto ISO
+    if isinstance(value, str) and hasattr(python_type, 'fromisoformat'):
+        try:
+            return python_type.fromisoformat(value)
+        except ValueError:
+            pass
+    raise exceptions.InvalidCursorError
+
+def decode_cursor(cursor : str, sort : str, types : List[type]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        content = json.loads(raw)
+    except ValueError:
+        raise exceptions.InvalidCursorError
+    if not isinstance(content, dict) or content.get("ordem") != sort:
+        raise exceptions.InvalidCursorError
+    values = content.get("valores")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise exceptions.InvalidCursorError
+    return [ _value(value, python_type) for value, python_type in zip(values, types) ]
+
+def next_cursor(data : List[Any], limit : int, sort : str, keys : List[str]) -> Optional[str]:
+    if limit <= 0 or len(data) < limit:
+        return None
+    last = data[-1]
+    return encode_cursor(sort, [ getattr(last, key) for key in keys ])
@@ -0,0 +1,108 @@
+import logging, sys, time
+from contextvars import ContextVar
+from decouple import config
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Any, Dict, List, Optional
+
+# Profiler de SQL por requisição (opcional, sql_profiler=True). Conta e cronometra
+# os comandos de cada requisição e responde com X-Query-Count e X-DB-Time (ms).
+# Comandos idênticos repetidos N_PLUS_ONE_THRESHOLD vezes ou mais (típico de
+# relacionamento lazy carregado item a item) e comandos acima de SLOW_QUERY_MS
+# vão para o log, com a função de crud.py que os emitiu e, os lentos, com o EXPLAIN.
+SQL_PROFILER = config("sql_profiler", default=False, cast=bool)
+SLOW_QUERY_MS = config("slow_query_ms", default=200, cast=float)
+N_PLUS_ONE_THRESHOLD = config("n_plus_one_threshold", default=5, cast=int)
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+logger = logging.getLogger("sql_profiler")
+
+class Profile:
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        # comando -> [execuções, segundos, origem]
+        self.statements : Dict[str, List[Any]] = {}
+
+    def record(self, statement : str, elapsed : float):
+        self.count += 1
+        self.time += elapsed
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [ 1, elapsed, _caller() ]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+_profile : ContextVar[Optional[Profile]] = ContextVar("sql_profile", default=None)
+
+def _caller() -> str:
+    # Primeiro frame em crud.py acima do SQLAlchemy
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_filename.endswith('crud.py'):
+            return f"crud.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+        frame = frame.f_back
+    return "?"
+
+def _explain(conn : Any, statement : str, parameters : Any) -> str:
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return ""
+    conn.info["profiler_explaining"] = True
+    try:
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        return '\n'.join(row[0] for row in rows)
+    except Exception as error:
+        return f"(EXPLAIN falhou: {error})"
+    finally:
+        conn.info["profiler_explaining"] = False
+
+def instrument(engine : Engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profiler_start"].pop()
+        if conn.info.get("profiler_explaining"):
+            return
+        profile = _profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            plan = "" if executemany else _explain(conn, statement, parameters)
+            logger.warning("Comando lento (%.1f ms) em %s:\n%s\n%s", elapsed * 1000, _caller(), statement, plan)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("profiler_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+class ProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = Profile()
+        async def send_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-query-count", str(profile.count).encode()),
+                    (b"x-db-time", f"{profile.time * 1000:.2f}".encode())
+                ]
+            await send(message)
+
+        token = _profile.set(profile)
+        try:
+            await self.app(scope, receive, send_headers)
+        finally:
+            _profile.reset(token)
+            for statement, (count, elapsed, caller) in profile.statements.items():
+                if count >= N_PLUS_ONE_THRESHOLD:
+                    logger.warning("Possível N+1 em %s %s: %d execuções (%.1f ms) do mesmo comando em %s:\n%s",
+                                   scope["method"], scope["path"], count, elapsed * 1000, caller, statement)
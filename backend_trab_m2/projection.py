@@ -0,0 +1,80 @@
+import functools
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from typing import Any, Dict, List, Optional, Tuple
+from database import Base
+import exceptions
+
+# Projeção de uma resposta: árvore { campo: None (coluna) | subárvore (relacionamento) }.
+# Sai do schema de resposta e dos parâmetros ?fields= e ?include= (listas separadas
+# por vírgula, com caminhos pontuados para os objetos aninhados):
+#
+#   ?fields=id,valor_total,data        só essas colunas, nenhum objeto aninhado
+#   ?include=imovel&fields=imovel.valor  imovel embutido, só com id e valor
+#
+# Sem nenhum dos dois, a resposta é a completa do schema. Com fields e sem include,
+# só entram os relacionamentos citados em fields. O id de cada nível sempre vem.
+Tree = Dict[str, Optional[dict]]
+Path = Tuple[str, ...]
+
+ALWAYS_LOADED = ('id', 'versao')
+
+def nested(schema : BaseModel, name : str) -> Optional[BaseModel]:
+    field_type = schema.__fields__[name].type_
+    if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+        return field_type
+    return None
+
+@functools.lru_cache(maxsize=None)
+def full(schema : BaseModel) -> Tree:
+    tree = {}
+    for name in schema.__fields__:
+        child = nested(schema, name)
+        tree[name] = full(child) if child is not None else None
+    return tree
+
+def _split(value : Optional[str]) -> Optional[List[Path]]:
+    if value is None:
+        return None
+    return [ tuple(part.strip() for part in item.split('.')) for item in value.split(',') if item.strip() ]
+
+def parse(schema : BaseModel, fields : Optional[str] = None, include : Optional[str] = None) -> Tree:
+    if fields is None and include is None:
+        return full(schema)
+    return _build(schema, _split(fields), _split(include) or [])
+
+def _build(schema : BaseModel, fields : Optional[List[Path]], include : List[Path]) -> Tree:
+    for path in (fields or []) + include:
+        if path[0] not in schema.__fields__ or (len(path) > 1 and nested(schema, path[0]) is None):
+            raise exceptions.InvalidFieldError
+    scalars = [ name for name in schema.__fields__ if nested(schema, name) is None ]
+    selected = { path[0] for path in fields or [] if len(path) == 1 and path[0] in scalars }
+    relationships = { path[0] for path in (fields or []) + include if nested(schema, path[0]) is not None }
+    tree = {}
+    for name in schema.__fields__:
+        if name in relationships:
+            child_fields = [ path[1:] for path in fields or [] if path[0] == name and len(path) > 1 ] or None
+            child_include = [ path[1:] for path in include if path[0] == name and len(path) > 1 ]
+            tree[name] = _build(nested(schema, name), child_fields, child_include)
+        elif name in scalars and (not selected or name in selected or name == 'id'):
+            tree[name] = None
+    return tree
+
+def loader_options(model : Base, tree : Tree, parent : Any = None) -> List[Any]:
+    # load_only nas colunas pedidas (mais id, versao e o discriminador da herança)
+    # e carga só dos relacionamentos presentes na árvore
+    mapper = inspect(model)
+    columns = [ getattr(model, name) for name, attribute in mapper.column_attrs.items()
+                if name in ALWAYS_LOADED or (name in tree and tree[name] is None)
+                or any(column is mapper.polymorphic_on for column in attribute.columns) ]
+    options = [ load_only(*columns) if parent is None else parent.load_only(*columns) ]
+    for name, child in tree.items():
+        if child is None or name not in mapper.relationships:
+            continue
+        relationship = mapper.relationships[name]
+        strategy = selectinload if relationship.uselist else joinedload
+        attribute = getattr(model, name)
+        loader = strategy(attribute) if parent is None else getattr(parent, strategy.__name__)(attribute)
+        options += loader_options(relationship.mapper.class_, child, loader)
+    return options
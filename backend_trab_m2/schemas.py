@@ -1,6 +1,25 @@
 from datetime import date
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, constr
+
+
+class BulkItemCreated(BaseModel):
+    index : int
+    id : int
+
+class BulkItemError(BaseModel):
+    index : int
+    detail : str
+
+class BulkResult(BaseModel):
+    created : List[BulkItemCreated] = list()
+    errors : List[BulkItemError] = list()
+
+class ImportResult(BaseModel):
+    imported : int = 0
+    rejected : int = 0
+    errors : List[BulkItemError] = list() # index = linha do arquivo
+
 
 
 class UsuarioBase(BaseModel):
@@ -28,10 +47,17 @@ class UsuarioLoginSchema(BaseModel):
             }
         }
 
+class Principal(BaseModel):
+    user_id : int
+    email : str
+    tipo : str
+
 class PaginatedUsuario(BaseModel):
     limit : int
     offset : int
     data : List['Usuario']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -50,6 +76,8 @@ class PaginatedProprietario(BaseModel):
     limit : int
     offset : int
     data : List['Proprietario']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -68,6 +96,8 @@ class PaginatedCorretor(BaseModel):
     limit : int
     offset : int
     data : List['Corretor']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -87,6 +117,8 @@ class PaginatedTag(BaseModel):
     limit : int
     offset : int
     data : List['Tag']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -106,6 +138,8 @@ class PaginatedEndereco(BaseModel):
     limit : int
     offset : int
     data : List['Endereco']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
     
 
@@ -134,10 +168,35 @@ class Imovel(ImovelBase):
     class Config:
         orm_mode = True
 
+class ImovelFilterBase(BaseModel):
+    valor_min : Optional[float] = None
+    valor_max : Optional[float] = None
+    tipo : Optional[int] = None
+    quartos_min : Optional[int] = None
+    banheiros_min : Optional[int] = None
+    vagas_min : Optional[int] = None
+    tamanho_min : Optional[int] = None
+    tamanho_max : Optional[int] = None
+    disponivel : Optional[bool] = None
+    id_proprietario : Optional[int] = None
+    cep_prefixo : Optional[constr(regex=r'^[0-9]{1,8}$')] = None
+    ordem : str = "id" # id, valor, tamanho; prefixo "-" para decrescente
+
+class ImovelFilter(ImovelFilterBase):
+    tags_all : List[int] = list()
+    tags_any : List[int] = list()
+    tags_none : List[int] = list()
+
+class RegiaoCount(BaseModel):
+    prefixo : str
+    total : int
+
 class PaginatedImovel(BaseModel):
     limit : int
     offset : int
     data : List['Imovel']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -159,6 +218,8 @@ class PaginatedTelefone(BaseModel):
     limit : int
     offset : int
     data : List['Telefone']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
 
 
 
@@ -182,3 +243,5 @@ class PaginatedTransacao(BaseModel):
     limit : int
     offset : int
     data : List['Transacao']
+    next_cursor : Optional[str] = None
+    total : Optional[int] = None
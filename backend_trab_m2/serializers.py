@@ -0,0 +1,58 @@
+import datetime, decimal, functools, json
+from operator import attrgetter
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+from typing import Any, Callable, Dict, Optional
+import projection
+
+# Serialização em uma passada: objeto do ORM -> dict (serializador montado uma
+# vez por schema/projeção) -> bytes JSON. Substitui jsonable_encoder seguido da
+# validação do response_model, que percorria cada objeto duas vezes.
+# Usa orjson quando instalado; sem ele, o json da biblioteca padrão.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Serializer = Callable[[Any], Optional[Dict[str, Any]]]
+
+def _default(value : Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"{type(value).__name__} não é serializável em JSON")
+
+def dumps(content : Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf8')
+
+def build(tree : projection.Tree) -> Serializer:
+    scalars = tuple(name for name, child in tree.items() if child is None)
+    children = tuple((name, build(child)) for name, child in tree.items() if child is not None)
+    if len(scalars) == 1:
+        single = attrgetter(scalars[0])
+        get = lambda entity: (single(entity),)
+    else:
+        get = attrgetter(*scalars) if scalars else (lambda entity: ())
+
+    def serialize(entity : Any) -> Optional[Dict[str, Any]]:
+        if entity is None:
+            return None
+        data = dict(zip(scalars, get(entity)))
+        for name, child in children:
+            value = getattr(entity, name)
+            data[name] = [ child(item) for item in value ] if isinstance(value, list) else child(value)
+        return data
+    return serialize
+
+@functools.lru_cache(maxsize=None)
+def for_schema(schema : BaseModel) -> Serializer:
+    return build(projection.full(schema))
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content : Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,302 @@
+import logging, select, threading, time, uuid
+from decouple import config
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import database, models
+
+logger = logging.getLogger(__name__)
+
+# Índice em memória de imovel_tag: para cada tag um bitset de ids de imóveis,
+# dividido em blocos de CHUNK_BITS ids (bloco -> int do Python, bit i ligado =
+# imóvel bloco * CHUNK_BITS + i tem a tag; blocos vazios não são guardados).
+# Interseção, união e exclusão de tags viram &, | e & ~ bloco a bloco, e uma
+# escrita reescreve só o bloco do imóvel em cada tag, não o bitset inteiro.
+#
+# Cada processo tem o seu índice, mantido pelas escritas do crud. As escritas
+# avisam os outros workers por NOTIFY na mesma transação (entregue no commit); uma
+# thread por processo escuta o canal e relê do banco as tags dos imóveis avisados.
+# A reconstrução completa (leitura de imovel e imovel_tag) acontece na subida,
+# quando a conexão de escuta é refeita (avisos podem ter se perdido) e, como rede
+# de segurança para cargas feitas fora da aplicação, a cada TAG_INDEX_TTL segundos
+# (0 desliga). Sem a escuta (tag_index_listen=False, ou PgBouncer em modo
+# transação, que não repassa LISTEN) só essa reconstrução traz escritas de outros
+# workers, e o TTL deve ser curto.
+#
+# O índice pode estar atrasado: crud.Imovel usa o resultado como candidatos e
+# confere as tags em SQL. A construção nunca bloqueia requisições: enquanto o
+# índice não está pronto, crud.Imovel filtra as tags só em SQL.
+TAG_INDEX_TTL = config("tag_index_ttl", default=3600, cast=int)
+TAG_INDEX_LISTEN = config("tag_index_listen", default=True, cast=bool)
+# Acima disso o resultado não vira lista de ids (crud.Imovel usa o filtro em SQL)
+TAG_INDEX_MAX_IDS = config("tag_index_max_ids", default=1000, cast=int)
+
+CHUNK_BITS = 4096
+CHANNEL = "imovel_tags"
+# Ids por aviso (o payload do NOTIFY tem limite de 8000 bytes)
+NOTIFY_BATCH = 500
+# Identifica os avisos deste processo, que já aplicou as próprias escritas
+ORIGIN = uuid.uuid4().hex[:12]
+
+Bitmap = Dict[int, int]
+
+def _bitmap(ids : Iterable[int]) -> Bitmap:
+    buffers : Dict[int, bytearray] = {}
+    for id in ids:
+        chunk, bit = divmod(id, CHUNK_BITS)
+        buffer = buffers.get(chunk)
+        if buffer is None:
+            buffer = buffers[chunk] = bytearray(CHUNK_BITS // 8)
+        buffer[bit >> 3] |= 1 << (bit & 7)
+    return { chunk: int.from_bytes(buffer, 'little') for chunk, buffer in buffers.items() }
+
+def _and(bitmap : Bitmap, other : Bitmap, negate : bool = False) -> Bitmap:
+    result = {}
+    for chunk, bits in bitmap.items():
+        mask = other.get(chunk, 0)
+        bits &= ~mask if negate else mask
+        if bits:
+            result[chunk] = bits
+    return result
+
+def _or(bitmap : Bitmap, other : Bitmap) -> Bitmap:
+    result = dict(bitmap)
+    for chunk, bits in other.items():
+        result[chunk] = result.get(chunk, 0) | bits
+    return result
+
+def _bits(bits : int, descending : bool = False) -> Iterator[int]:
+    while bits:
+        if descending:
+            bit = bits.bit_length() - 1
+            bits ^= 1 << bit
+        else:
+            lowest = bits & -bits
+            bit = lowest.bit_length() - 1
+            bits ^= lowest
+        yield bit
+
+def _set(bitmap : Bitmap, id : int, value : bool):
+    chunk, bit = divmod(id, CHUNK_BITS)
+    bits = bitmap.get(chunk, 0)
+    bits = bits | (1 << bit) if value else bits & ~(1 << bit)
+    if bits:
+        bitmap[chunk] = bits
+    else:
+        bitmap.pop(chunk, None)
+
+def to_ids(bitmap : Bitmap) -> List[int]:
+    return [ chunk * CHUNK_BITS + bit for chunk in sorted(bitmap) for bit in _bits(bitmap[chunk]) ]
+
+def popcount(bitmap : Bitmap) -> int:
+    return sum(bin(bits).count('1') for bits in bitmap.values())
+
+def first_ids(bitmap : Bitmap, count : int, after : Optional[int] = None, descending : bool = False) -> List[int]:
+    # Os `count` primeiros ids na ordem pedida, depois do id `after` (cursor): só
+    # os blocos até o último id devolvido são percorridos
+    ids = []
+    for chunk in sorted(bitmap, reverse=descending):
+        base, bits = chunk * CHUNK_BITS, bitmap[chunk]
+        if after is not None:
+            if descending:
+                if base >= after:
+                    continue
+                bits &= (1 << min(after - base, CHUNK_BITS)) - 1
+            else:
+                if base + CHUNK_BITS <= after + 1:
+                    continue
+                bits &= ~((1 << max(after - base + 1, 0)) - 1)
+        for bit in _bits(bits, descending):
+            ids.append(base + bit)
+            if len(ids) == count:
+                return ids
+    return ids
+
+def listening() -> bool:
+    return TAG_INDEX_LISTEN and not database.DB_PGBOUNCER
+
+def notify(db : Session, imoveis : Iterable[int] = (), tags : Iterable[int] = ()):
+    # Avisa os outros workers na transação da escrita: o NOTIFY só é entregue no commit
+    if not listening():
+        return
+    messages = []
+    for kind, ids in (('i', sorted(set(imoveis))), ('t', sorted(set(tags)))):
+        for start in range(0, len(ids), NOTIFY_BATCH):
+            messages.append(f"{ORIGIN}:{kind}:{','.join(map(str, ids[start:start + NOTIFY_BATCH]))}")
+    if messages:
+        db.connection().execute(text("SELECT pg_notify(:canal, mensagem) FROM unnest(CAST(:mensagens AS text[])) AS mensagem"),
+                                { "canal": CHANNEL, "mensagens": messages })
+
+@event.listens_for(Session, 'after_flush')
+def _track(db : Session, flush_context : Any):
+    # Escritas pelo ORM (create, update, delete); as inserções em lote chamam notify
+    imoveis = [ entity.id for entity in (*db.new, *db.dirty, *db.deleted) if isinstance(entity, models.Imovel) ]
+    tags = [ entity.id for entity in db.deleted if isinstance(entity, models.Tag) ]
+    if imoveis or tags:
+        notify(db, imoveis, tags)
+
+class TagBitmapIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._imoveis : Bitmap = {}
+        self._tags : Dict[int, Bitmap] = {}
+        self._built_at : Optional[float] = None
+        self._pending : Optional[List[Callable]] = None
+        self._listener : Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    def build(self, db : Session, wait : bool = False):
+        if not self._build_lock.acquire(blocking=wait):
+            return
+        try:
+            with self._lock:
+                self._pending = []
+            imoveis = _bitmap(id for (id,) in db.query(models.Imovel.id).yield_per(10000))
+            tags : Dict[int, List[int]] = {}
+            for id_imovel, id_tag in db.execute(models.ImovelTag.select()).yield_per(10000):
+                tags.setdefault(id_tag, []).append(id_imovel)
+            tags = { id_tag: _bitmap(ids) for id_tag, ids in tags.items() }
+            with self._lock:
+                self._imoveis, self._tags = imoveis, tags
+                # Reaplica as escritas e os avisos recebidos durante a leitura
+                for operation in self._pending:
+                    operation()
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+            self._build_lock.release()
+
+    def ensure_fresh(self):
+        if listening():
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, daemon=True)
+                    self._listener.start()
+            if self._built_at is None:
+                # A primeira construção é feita pela escuta, depois do LISTEN
+                return
+        stale = self._built_at is None or (TAG_INDEX_TTL and time.monotonic() - self._built_at > TAG_INDEX_TTL)
+        if stale and not self._build_lock.locked():
+            threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self, wait : bool = False):
+        with database.SessionLocal() as db:
+            self.build(db, wait)
+
+    def _listen(self):
+        # Conexão dedicada, fora do pool, em autocommit
+        import psycopg2
+        while True:
+            connection = None
+            try:
+                connection = psycopg2.connect(database.DATABASE_URL)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                # Escritas anteriores ao LISTEN (ou de quando a conexão caiu) só aparecem reconstruindo
+                self._rebuild(wait=True)
+                while True:
+                    if select.select([ connection ], [], [], 60)[0]:
+                        connection.poll()
+                        payloads = [ notification.payload for notification in connection.notifies ]
+                        connection.notifies.clear()
+                        self._receive(connection, payloads)
+            except Exception as error:
+                logger.warning("Escuta do índice de tags interrompida: %r", error)
+                time.sleep(5)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def _receive(self, connection : Any, payloads : List[str]):
+        imoveis, tags = set(), set()
+        for payload in payloads:
+            origin, kind, ids = payload.split(':', 2)
+            if origin != ORIGIN:
+                (imoveis if kind == 'i' else tags).update(int(id) for id in ids.split(','))
+        for id_tag in tags:
+            self.remove_tag(id_tag)
+        if not imoveis:
+            return
+        found : Dict[int, set] = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT i.id, t.id_tag FROM imovel i LEFT JOIN imovel_tag t ON t.id_imovel = i.id "
+                           "WHERE i.id = ANY(%s)", (list(imoveis),))
+            for id_imovel, id_tag in cursor:
+                found.setdefault(id_imovel, set()).update(() if id_tag is None else (id_tag,))
+        for id_imovel in imoveis - found.keys():
+            self.remove_imovel(id_imovel)
+        for id_imovel, id_tags in found.items():
+            self.set_tags(id_imovel, id_tags)
+
+    def _apply(self, operation : Callable):
+        with self._lock:
+            operation()
+            if self._pending is not None:
+                self._pending.append(operation)
+
+    def set_tags(self, id_imovel : int, id_tags : Iterable[int]):
+        id_tags = set(id_tags)
+        def operation():
+            _set(self._imoveis, id_imovel, True)
+            self._clear(id_imovel, keep=id_tags)
+            for id_tag in id_tags:
+                _set(self._tags.setdefault(id_tag, {}), id_imovel, True)
+        self._apply(operation)
+
+    def _clear(self, id_imovel : int, keep : Iterable[int] = ()):
+        # Só o bloco do imóvel é lido em cada tag, e só é reescrito onde o bit está ligado
+        chunk, bit = divmod(id_imovel, CHUNK_BITS)
+        mask = 1 << bit
+        for id_tag, bitmap in self._tags.items():
+            bits = bitmap.get(chunk)
+            if bits is not None and bits & mask and id_tag not in keep:
+                _set(bitmap, id_imovel, False)
+
+    def add_imoveis(self, imoveis : Iterable[Tuple[int, Iterable[int]]]):
+        # Imóveis novos (create, create_bulk, importação): as máscaras do lote são
+        # montadas fora do lock e cada tag recebe um único OR por bloco
+        ids, ids_by_tag = [], {}
+        for id_imovel, id_tags in imoveis:
+            ids.append(id_imovel)
+            for id_tag in set(id_tags):
+                ids_by_tag.setdefault(id_tag, []).append(id_imovel)
+        if not ids:
+            return
+        imoveis_mask = _bitmap(ids)
+        masks = { id_tag: _bitmap(tag_ids) for id_tag, tag_ids in ids_by_tag.items() }
+        def operation():
+            self._imoveis = _or(self._imoveis, imoveis_mask)
+            for id_tag, mask in masks.items():
+                self._tags[id_tag] = _or(self._tags.get(id_tag, {}), mask)
+        self._apply(operation)
+
+    def remove_imovel(self, id_imovel : int):
+        def operation():
+            _set(self._imoveis, id_imovel, False)
+            self._clear(id_imovel)
+        self._apply(operation)
+
+    def remove_tag(self, id_tag : int):
+        self._apply(lambda: self._tags.pop(id_tag, None))
+
+    def query(self, tags_all : Iterable[int] = (), tags_any : Iterable[int] = (), tags_none : Iterable[int] = ()) -> Bitmap:
+        with self._lock:
+            result = self._imoveis
+            for id_tag in tags_all:
+                result = _and(result, self._tags.get(id_tag, {}))
+            if tags_any:
+                union = {}
+                for id_tag in tags_any:
+                    union = _or(union, self._tags.get(id_tag, {}))
+                result = _and(result, union)
+            for id_tag in tags_none:
+                result = _and(result, self._tags.get(id_tag, {}), negate=True)
+            return dict(result)
+
+index = TagBitmapIndex()
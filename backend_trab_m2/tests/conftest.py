@@ -0,0 +1,61 @@
+import asyncio, os, pathlib, sys
+import httpx
+import pytest
+from sqlalchemy import text
+
+# Os módulos do backend são importados pelo nome (como em main.py)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import database
+
+def database_url() -> str:
+    return database.engine.url.render_as_string(hide_password=True)
+
+@pytest.fixture(scope="session")
+def engine():
+    database.init()
+    try:
+        with database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as error:
+        pytest.skip(f"banco indisponível ({database_url()}): {error}")
+    return database.engine
+
+class Api:
+    # Cliente síncrono sobre o app ASGI. Um único event loop para a sessão toda:
+    # as conexões do pool assíncrono ficam presas ao loop em que foram abertas.
+    def __init__(self, app, token : str):
+        self.loop = asyncio.new_event_loop()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste",
+                                        headers={ "Authorization": f"Bearer {token}" })
+
+    def request(self, method : str, url : str, **kwargs) -> httpx.Response:
+        return self.loop.run_until_complete(self.client.request(method, url, **kwargs))
+
+    def get(self, url : str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url : str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url : str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url : str, **kwargs) -> httpx.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.run_until_complete(database.dispose())
+        self.loop.close()
+
+@pytest.fixture(scope="session")
+def api(engine):
+    os.environ.setdefault("secret", "segredo-dos-testes-de-api-com-32-bytes")
+    os.environ.setdefault("algorithm", "HS256")
+    from auth import auth_handler
+    import main
+    auth_handler.jwt_settings.cache_clear()
+    client = Api(main.app, auth_handler.signJWT(1, "teste@teste.local", "corretor")["access_token"])
+    yield client
+    client.close()
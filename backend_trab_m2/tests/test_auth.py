@@ -0,0 +1,47 @@
+import asyncio, time
+import httpx, jwt
+import pytest
+from auth import auth_handler
+from auth.auth_bearer import JWTBearer
+
+SECRET = "segredo-de-teste-com-32-bytes-ou-mais"
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setenv("secret", SECRET)
+    monkeypatch.setenv("algorithm", "HS256")
+    auth_handler.jwt_settings.cache_clear()
+    auth_handler._token_cache.clear()
+    yield
+    auth_handler.jwt_settings.cache_clear()
+    auth_handler._token_cache.clear()
+
+def token(exp : float, **payload) -> str:
+    return jwt.encode({ "user_id": 1, "email": "a@b.com", "tipo": "corretor", "exp": exp, **payload }, SECRET, algorithm="HS256")
+
+def test_principal_do_token():
+    principal = JWTBearer().verify_jwt(auth_handler.signJWT(7, "a@b.com", "proprietario")["access_token"])
+    assert (principal.user_id, principal.email, principal.tipo) == (7, "a@b.com", "proprietario")
+
+def test_token_no_formato_antigo_e_rejeitado():
+    # Antes o user_id carregava o email
+    assert JWTBearer().verify_jwt(token(time.time() + 60, user_id="a@b.com")) is None
+
+def test_token_em_cache_expira_no_exp():
+    expirando = token(time.time() + 1)
+    assert auth_handler.decodeJWT(expirando) is not None
+    assert expirando in auth_handler._token_cache
+    time.sleep(1.2)
+    assert auth_handler.decodeJWT(expirando) is None
+    assert expirando not in auth_handler._token_cache
+
+def test_rota_protegida_exige_token_valido():
+    import main
+    async def status(headers : dict) -> int:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://teste") as client:
+            return (await client.get("/api/db/pool", headers=headers)).status_code
+    antigo = token(time.time() + 60, user_id="a@b.com")
+    valido = auth_handler.signJWT(7, "a@b.com", "corretor")["access_token"]
+    assert asyncio.run(status({})) == 403
+    assert asyncio.run(status({ "Authorization": f"Bearer {antigo}" })) == 403
+    assert asyncio.run(status({ "Authorization": f"Bearer {valido}" })) == 200
@@ -0,0 +1,43 @@
+import pytest
+import crud, exceptions
+
+@pytest.fixture
+def endereco(api):
+    id = api.post("/api/enderecos/", json={ "cep": "88000000", "numero": 7 }).json()["id"]
+    yield id
+    api.delete(f"/api/enderecos/{id}")
+
+def imovel(id_proprietario : int, id_endereco : int, **campos) -> dict:
+    return { "id_proprietario": id_proprietario, "id_endereco": id_endereco, "nome": "imóvel do teste de lote", "tipo": 1,
+             "valor": 1000.0, "descricao": "", "tamanho": 50, "quartos": 1, "vagas": 0, "banheiros": 1, "path_foto": "", **campos }
+
+def test_erros_por_item(api, endereco):
+    id_proprietario = api.get("/api/proprietarios/", params={ "limit": 1 }).json()["data"][0]["id"]
+    itens = [
+        { "nome": "sem os demais campos" },
+        imovel(id_proprietario, endereco),
+        imovel(0, endereco),
+        imovel(id_proprietario, endereco),
+        imovel(id_proprietario, endereco, id_tags=[ 0 ])
+    ]
+    response = api.post("/api/imoveis/bulk", json=itens)
+    assert response.status_code == 200
+    body = response.json()
+    try:
+        assert [ created["index"] for created in body["created"] ] == [ 1 ]
+        assert body["errors"] == [
+            { "index": 0, "detail": "DADOS_INVALIDOS" },
+            { "index": 2, "detail": exceptions.ProprietarioNotFoundError().detail },
+            { "index": 3, "detail": exceptions.EnderecoAlreadyTakenError().detail },
+            { "index": 4, "detail": exceptions.TagNotFoundError().detail }
+        ]
+    finally:
+        for created in body["created"]:
+            api.delete(f"/api/imoveis/{created['id']}")
+
+def test_lote_acima_do_limite_responde_413(api, monkeypatch):
+    monkeypatch.setattr(crud, "BULK_MAX_ITEMS", 2)
+    itens = [ { "nome": f"tag {i}", "tipo": False } for i in range(3) ]
+    response = api.post("/api/tags/bulk", json=itens)
+    assert (response.status_code, response.json()["detail"]) == (413, exceptions.BulkTooLargeError().detail)
+    assert not any(tag["nome"] == "tag 0" for tag in api.get("/api/tags/", params={ "limit": 1000 }).json()["data"])
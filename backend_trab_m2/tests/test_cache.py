@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+import cache, crud, database, schemas
+
+@pytest.fixture
+def entity_cache():
+    # LocalBackend próprio por teste, com TTL longo para não expirar no meio
+    original = cache.entity_cache.backend
+    backend = cache.LocalBackend(maxsize=100, ttl=60)
+    cache.set_backend(backend)
+    yield backend
+    cache.set_backend(original)
+
+@pytest.fixture
+def db(engine):
+    with database.SessionLocal() as db:
+        yield db
+
+@pytest.fixture
+def tag(db):
+    db_tag = crud.Tag.create(db, schemas.TagCreate(nome="tag do teste de cache", tipo=False))
+    yield db_tag.id
+    db.rollback()
+    if (db_tag := db.get(crud.models.Tag, db_tag.id)) is not None:
+        db.delete(db_tag)
+        db.commit()
+
+def cached(backend : cache.LocalBackend, key : str) -> bool:
+    return asyncio.run(backend.get(key)) is not None
+
+def get_serialized(db, entity_class, id : int, schema):
+    return asyncio.run(crud.AsyncBaseCRUD.get_serialized(db, entity_class, id, schema))
+
+def test_leitura_passa_pelo_cache(db, entity_cache, tag):
+    assert not cached(entity_cache, f"Tag:{tag}")
+    etag, body = get_serialized(db, crud.Tag, tag, schemas.Tag)
+    assert cached(entity_cache, f"Tag:{tag}")
+    # A segunda leitura sai do cache mesmo com a linha alterada por fora
+    db.get(crud.models.Tag, tag).nome = "alterada sem invalidar"
+    db.commit()
+    assert get_serialized(db, crud.Tag, tag, schemas.Tag) == (etag, body)
+
+def test_update_invalida(db, entity_cache, tag):
+    get_serialized(db, crud.Tag, tag, schemas.Tag)
+    asyncio.run(crud.AsyncBaseCRUD.update(db, crud.Tag, tag, schemas.TagCreate(nome="tag atualizada", tipo=True)))
+    assert not cached(entity_cache, f"Tag:{tag}")
+    _, body = get_serialized(db, crud.Tag, tag, schemas.Tag)
+    assert b"tag atualizada" in body
+
+def test_delete_invalida(db, entity_cache, tag):
+    get_serialized(db, crud.Tag, tag, schemas.Tag)
+    asyncio.run(crud.AsyncBaseCRUD.delete(db, crud.Tag, tag))
+    assert not cached(entity_cache, f"Tag:{tag}")
+
+@pytest.mark.parametrize("entity_class", [ crud.Proprietario, crud.Usuario ])
+def test_update_do_proprietario_invalida_imoveis(db, entity_cache, entity_class):
+    imovel = db.query(crud.models.Imovel).order_by(crud.models.Imovel.id).first()
+    if imovel is None:
+        pytest.skip("banco sem imóveis")
+    id, proprietario = imovel.id, imovel.proprietario
+    get_serialized(db, crud.Imovel, id, schemas.Imovel)
+    get_serialized(db, crud.Proprietario, proprietario.id, schemas.Proprietario)
+    assert cached(entity_cache, f"Imovel:{id}")
+    # Usuario e Proprietario são a mesma linha: atualizar por qualquer um dos
+    # recursos invalida as respostas de ambos e os imóveis que embutem o dono
+    dados = schemas.UsuarioCreate(nome=proprietario.nome, email=proprietario.email, path_foto=proprietario.path_foto,
+                                  cpf=proprietario.cpf, senha="")
+    asyncio.run(crud.AsyncBaseCRUD.update(db, entity_class, proprietario.id, dados))
+    assert not cached(entity_cache, f"Imovel:{id}")
+    assert not cached(entity_cache, f"Proprietario:{proprietario.id}")
+    assert not cached(entity_cache, f"Usuario:{proprietario.id}")
@@ -0,0 +1,29 @@
+from sqlalchemy import delete, func, select
+import counters, database, models
+
+def total_real(db) -> int:
+    return db.scalar(select(func.count()).select_from(models.Tag))
+
+def test_inicializacao_nao_perde_escrita_em_andamento(engine):
+    with database.SessionLocal() as escrita, database.SessionLocal() as leitura:
+        leitura.execute(delete(models.Contador).where(models.Contador.tabela == 'tag'))
+        leitura.commit()
+        tag = models.Tag(nome="contador em corrida", tipo=False)
+        escrita.add(tag)
+        escrita.flush()
+        # Contador inicializado enquanto a inserção ainda não foi confirmada
+        assert counters.exact(leitura, models.Tag) == total_real(leitura)
+        escrita.commit()
+        try:
+            assert counters.exact(leitura, models.Tag) == total_real(leitura)
+        finally:
+            escrita.delete(tag)
+            escrita.commit()
+        assert counters.exact(leitura, models.Tag) == total_real(leitura)
+
+def test_recount_respeita_os_slots(engine):
+    with database.SessionLocal() as db:
+        counters.add(db, models.Tag, 5)
+        db.commit()
+        counters.recount(db, models.Tag)
+        assert counters.exact(db, models.Tag) == total_real(db)
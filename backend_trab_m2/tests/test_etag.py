@@ -0,0 +1,36 @@
+import pytest
+
+@pytest.fixture
+def tag(api):
+    id = api.post("/api/tags/", json={ "nome": "tag do teste de etag", "tipo": False }).json()["id"]
+    yield id
+    api.delete(f"/api/tags/{id}")
+
+def test_get_responde_304_com_etag_igual(api, tag):
+    tag_etag = api.get(f"/api/tags/{tag}").headers["ETag"]
+    response = api.get(f"/api/tags/{tag}", headers={ "If-None-Match": tag_etag })
+    assert (response.status_code, response.content) == (304, b"")
+    assert response.headers["ETag"] == tag_etag
+
+def test_etag_muda_com_a_entidade(api, tag):
+    antes = api.get(f"/api/tags/{tag}").headers["ETag"]
+    api.put(f"/api/tags/{tag}", json={ "nome": "tag do teste de etag", "tipo": True })
+    response = api.get(f"/api/tags/{tag}", headers={ "If-None-Match": antes })
+    assert response.status_code == 200
+    assert response.headers["ETag"] != antes
+
+def test_if_match_divergente_responde_412(api, tag):
+    antes = api.get(f"/api/tags/{tag}").headers["ETag"]
+    assert api.put(f"/api/tags/{tag}", json={ "nome": "primeira escrita", "tipo": False },
+                   headers={ "If-Match": antes }).status_code == 200
+    # A segunda escrita com a versão lida antes da primeira é recusada
+    response = api.put(f"/api/tags/{tag}", json={ "nome": "segunda escrita", "tipo": False }, headers={ "If-Match": antes })
+    assert (response.status_code, response.json()["detail"]) == (412, "VERSAO_DIVERGENTE")
+    assert api.delete(f"/api/tags/{tag}", headers={ "If-Match": antes }).status_code == 412
+    assert api.get(f"/api/tags/{tag}").json()["nome"] == "primeira escrita"
+
+def test_etag_da_lista_inclui_limit_e_offset(api, tag):
+    pagina = api.get("/api/tags/", params={ "limit": 5 })
+    assert api.get("/api/tags/", params={ "limit": 5 }, headers={ "If-None-Match": pagina.headers["ETag"] }).status_code == 304
+    for params in ({ "limit": 6 }, { "limit": 5, "offset": 1 }):
+        assert api.get("/api/tags/", params=params, headers={ "If-None-Match": pagina.headers["ETag"] }).status_code == 200
@@ -0,0 +1,30 @@
+import database
+from auth import auth_handler
+
+def test_live(api):
+    assert api.get("/health/live").json() == { "status": "ok" }
+
+def test_ready(api):
+    response = api.get("/health/ready")
+    assert (response.status_code, response.json()) == (200, { "status": "ok", "banco": True, "auth": True })
+
+def test_ready_sem_banco(api, monkeypatch):
+    async def ping():
+        return False
+    monkeypatch.setattr(database, "ping", ping)
+    response = api.get("/health/ready")
+    assert (response.status_code, response.json()) == (503, { "status": "indisponivel", "banco": False, "auth": True })
+
+def test_ready_sem_configuracao_do_jwt(api, monkeypatch):
+    monkeypatch.delenv("secret", raising=False)
+    auth_handler.jwt_settings.cache_clear()
+    try:
+        response = api.get("/health/ready")
+        assert (response.status_code, response.json()["auth"]) == (503, False)
+    finally:
+        monkeypatch.undo()
+        auth_handler.jwt_settings.cache_clear()
+
+def test_ping_respeita_o_timeout(api):
+    assert api.loop.run_until_complete(database.ping(timeout=0)) is False
+    assert api.loop.run_until_complete(database.ping()) is True
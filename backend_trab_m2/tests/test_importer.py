@@ -0,0 +1,87 @@
+import io, json
+from itertools import islice
+import pytest
+from sqlalchemy import select
+import database, exceptions, importer, models
+
+NOME = "imóvel do teste de importação"
+
+@pytest.fixture
+def referencias(api):
+    with database.SessionLocal() as db:
+        yield db.scalar(select(models.Proprietario.id).limit(1)), db.scalar(select(models.Tag.nome).limit(1))
+        # Remove pela API o que foi importado, para manter contadores e índice de tags em dia
+        for id, id_endereco in db.execute(select(models.Imovel.id, models.Imovel.id_endereco).where(models.Imovel.nome == NOME)):
+            api.delete(f"/api/imoveis/{id}")
+            api.delete(f"/api/enderecos/{id_endereco}")
+
+def linha(id_proprietario : int, **campos) -> dict:
+    return { "id_proprietario": id_proprietario, "nome": NOME, "tipo": 1, "valor": 1000.0, "descricao": "", "tamanho": 50,
+             "quartos": 1, "vagas": 0, "banheiros": 1, "path_foto": "", "cep": "88000000", "numero": 1, "tags": [], **campos }
+
+def test_ndjson_rejeita_por_linha(referencias):
+    id_proprietario, tag = referencias
+    linhas = [
+        json.dumps(linha(id_proprietario, tags=[ tag ])),
+        "{ não é json",
+        "",
+        json.dumps(linha(0)),
+        json.dumps(linha(id_proprietario, tags=[ "tag que não existe" ])),
+        json.dumps(linha(id_proprietario, quartos="muitos")),
+        json.dumps(linha(id_proprietario, numero=2))
+    ]
+    result = importer.import_file(io.StringIO("\n".join(linhas) + "\n"), "ndjson", chunk_size=2)
+    assert (result.imported, result.rejected) == (2, 4)
+    assert [ (error.index, error.detail) for error in result.errors ] == [
+        (2, "LINHA_INVALIDA"),
+        (4, exceptions.ProprietarioNotFoundError().detail),
+        (5, exceptions.TagNotFoundError().detail),
+        (6, "DADOS_INVALIDOS")
+    ]
+
+def test_csv_pela_api(api, referencias):
+    id_proprietario, tag = referencias
+    colunas = importer.IMOVEL_COLUMNS + [ 'cep', 'numero', 'tags' ]
+    linhas = [ ",".join(colunas) ]
+    for row in (linha(id_proprietario, tags=tag), linha(id_proprietario, valor="caro"), linha(0)):
+        linhas.append(",".join(str(row[coluna]) for coluna in colunas))
+    response = api.post("/api/imoveis/import", files={ "arquivo": ("imoveis.csv", "\n".join(linhas).encode("utf8"), "text/csv") })
+    assert response.status_code == 200
+    # A linha 1 é o cabeçalho
+    assert response.json() == {
+        "imported": 1,
+        "rejected": 2,
+        "errors": [ { "index": 3, "detail": "DADOS_INVALIDOS" }, { "index": 4, "detail": exceptions.ProprietarioNotFoundError().detail } ]
+    }
+
+def test_formato_desconhecido(api):
+    response = api.post("/api/imoveis/import", params={ "format": "xml" }, files={ "arquivo": ("imoveis.xml", b"<imoveis/>") })
+    assert (response.status_code, response.json()["detail"]) == (400, exceptions.InvalidFormatError().detail)
+
+def carregar(importador : importer.Importer, linhas : list, chunk_size : int):
+    rows = importer.read_rows(io.StringIO("\n".join(json.dumps(row) for row in linhas) + "\n"), "ndjson")
+    while chunk := list(islice(rows, chunk_size)):
+        importador.load_chunk(chunk)
+    return importador.result
+
+def test_referencia_removida_depois_de_resolvida(referencias):
+    id_proprietario, _ = referencias
+    with database.SessionLocal() as db:
+        importador = importer.Importer(db)
+        # Como se o proprietário -1 tivesse sido resolvido num bloco anterior e removido depois
+        importador.proprietarios.add(-1)
+        result = carregar(importador, [ linha(id_proprietario), linha(-1), linha(id_proprietario, numero=2) ], 2)
+    assert (result.imported, result.rejected) == (2, 1)
+    assert [ (error.index, error.detail) for error in result.errors ] == [ (2, exceptions.ProprietarioNotFoundError().detail) ]
+
+def test_conflito_rejeita_so_as_linhas_do_bloco(referencias, monkeypatch):
+    id_proprietario, _ = referencias
+    resolver = importer.Importer._resolve_proprietarios
+    def resolver_com_fantasma(self, ids : set):
+        resolver(self, ids)
+        self.proprietarios.add(-1)
+    monkeypatch.setattr(importer.Importer, "_resolve_proprietarios", resolver_com_fantasma)
+    with database.SessionLocal() as db:
+        result = carregar(importer.Importer(db), [ linha(id_proprietario), linha(id_proprietario, numero=2), linha(-1) ], 2)
+    assert (result.imported, result.rejected) == (2, 1)
+    assert [ (error.index, error.detail) for error in result.errors ] == [ (3, "CONFLITO_NA_GRAVACAO") ]
@@ -0,0 +1,30 @@
+import metrics
+
+def contagem(method : str, route : str, status : int) -> int:
+    state = metrics.REQUEST_DURATION._values.get((method, route, status))
+    return sum(state[0]) if state is not None else 0
+
+def test_rota_pelo_template(api):
+    id = api.get("/api/tags/", params={ "limit": 1 }).json()["data"][0]["id"]
+    antes = contagem("GET", "/api/tags/{id}", 200), contagem("GET", "<sem_rota>", 404)
+    api.get(f"/api/tags/{id}")
+    api.get("/nao/existe")
+    assert (contagem("GET", "/api/tags/{id}", 200), contagem("GET", "<sem_rota>", 404)) == (antes[0] + 1, antes[1] + 1)
+
+def test_template_sai_da_tabela_sem_percorrer_as_rotas():
+    def endpoint():
+        pass
+    # Sem "app" no scope: percorrer as rotas daria KeyError
+    assert metrics.route_template({ "endpoint": endpoint }, { endpoint: "/api/x/{id}" }) == "/api/x/{id}"
+    assert metrics.route_template({}, {}) == "<sem_rota>"
+
+def test_endpoint_em_mais_de_um_caminho_fica_fora_da_tabela():
+    class Route:
+        def __init__(self, path, endpoint):
+            self.path, self.endpoint = path, endpoint
+    def unico():
+        pass
+    def compartilhado():
+        pass
+    rotas = [ Route("/a", unico), Route("/b", compartilhado), Route("/c", compartilhado) ]
+    assert metrics.route_templates(rotas) == { unico: "/a" }
@@ -0,0 +1,35 @@
+import pagination
+
+def walk(api, url : str, limit : int, pages : int, **filtros):
+    ids, cursor = [], None
+    for _ in range(pages):
+        params = { **filtros, "limit": limit } if cursor is None else { **filtros, "limit": limit, "cursor": cursor }
+        response = api.get(url, params=params)
+        assert response.status_code == 200
+        body = response.json()
+        ids.extend(item["id"] for item in body["data"])
+        if (cursor := body["next_cursor"]) is None:
+            break
+    return ids
+
+def test_cursor_percorre_como_o_offset(api):
+    por_cursor = walk(api, "/api/tags/", 3, 3)
+    por_offset = [ item["id"] for item in api.get("/api/tags/", params={ "limit": 9 }).json()["data"] ]
+    assert por_cursor == por_offset
+
+def test_cursor_com_ordenacao_por_valor(api):
+    ids = walk(api, "/api/imoveis/", 5, 3, ordem="-valor")
+    valores = [ api.get(f"/api/imoveis/{id}", params={ "fields": "valor" }).json()["valor"] for id in ids ]
+    assert len(set(ids)) == len(ids)
+    assert valores == sorted(valores, reverse=True)
+
+def test_ultima_pagina_sem_cursor(api):
+    total = len(api.get("/api/tags/", params={ "limit": 1000 }).json()["data"])
+    assert api.get("/api/tags/", params={ "limit": total + 1 }).json()["next_cursor"] is None
+
+def test_cursor_invalido(api):
+    de_outra_ordem = pagination.encode_cursor("valor", [ 10.0, 1 ])
+    com_tipo_errado = pagination.encode_cursor("id", [ "1" ])
+    for cursor in ("nao-e-base64!", de_outra_ordem, com_tipo_errado):
+        response = api.get("/api/imoveis/", params={ "cursor": cursor })
+        assert (response.status_code, response.json()["detail"]) == (400, "CURSOR_INVALIDO")
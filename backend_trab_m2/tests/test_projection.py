@@ -0,0 +1,39 @@
+import pytest
+import exceptions, projection, schemas
+
+ESCALARES = { name for name in schemas.Imovel.__fields__ if projection.nested(schemas.Imovel, name) is None }
+
+@pytest.fixture(scope="module")
+def imovel(api):
+    return api.get("/api/imoveis/", params={ "limit": 1 }).json()["data"][0]["id"]
+
+def test_fields_so_com_as_colunas_pedidas(api, imovel):
+    body = api.get(f"/api/imoveis/{imovel}", params={ "fields": "valor,nome" }).json()
+    assert set(body) == { "id", "valor", "nome" }
+
+def test_fields_aninhado(api, imovel):
+    body = api.get(f"/api/imoveis/{imovel}", params={ "fields": "valor,proprietario.nome" }).json()
+    assert set(body) == { "id", "valor", "proprietario" }
+    assert set(body["proprietario"]) == { "id", "nome" }
+
+def test_include_so_com_os_relacionamentos_pedidos(api, imovel):
+    body = api.get(f"/api/imoveis/{imovel}", params={ "include": "tags" }).json()
+    assert set(body) == ESCALARES | { "tags" }
+    completo = api.get(f"/api/imoveis/{imovel}").json()
+    assert body["tags"] == completo["tags"]
+
+def test_projecao_na_lista(api):
+    body = api.get("/api/imoveis/", params={ "limit": 3, "fields": "valor" }).json()
+    assert [ set(item) for item in body["data"] ] == [ { "id", "valor" } ] * 3
+
+def test_etag_depende_da_projecao(api, imovel):
+    completo = api.get(f"/api/imoveis/{imovel}").headers["ETag"]
+    parcial = api.get(f"/api/imoveis/{imovel}", params={ "fields": "valor" })
+    assert parcial.headers["ETag"] != completo
+    assert api.get(f"/api/imoveis/{imovel}", params={ "fields": "valor" },
+                   headers={ "If-None-Match": parcial.headers["ETag"] }).status_code == 304
+
+@pytest.mark.parametrize("params", [ { "fields": "inexistente" }, { "include": "valor.id" }, { "fields": "tags.inexistente" } ])
+def test_campo_invalido(api, imovel, params):
+    response = api.get(f"/api/imoveis/{imovel}", params=params)
+    assert (response.status_code, response.json()["detail"]) == (400, exceptions.InvalidFieldError().detail)
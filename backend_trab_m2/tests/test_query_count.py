@@ -0,0 +1,41 @@
+import contextlib
+from typing import Tuple
+import pytest
+from sqlalchemy import event
+import crud, database, models, schemas
+
+# O número de comandos de uma listagem não pode crescer com o tamanho da página:
+# um relacionamento fora de loader_options vira um lazy load por linha (N+1)
+LISTAGENS = (
+    (crud.Imovel.get_all, models.Imovel, schemas.Imovel),
+    (crud.Transacao.get_all, models.Transacao, schemas.Transacao),
+)
+
+@contextlib.contextmanager
+def statements(engine):
+    executed = []
+    def count(connection, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+def listar(engine, get_all, schema, limit : int) -> Tuple[int, int]:
+    # Sessão nova a cada vez, para o identity map não esconder carregamentos
+    with database.SessionLocal() as db, statements(engine) as executed:
+        data, _ = get_all(db, 0, limit)
+        for item in data:
+            schema.from_orm(item).dict()
+        return len(executed), len(data)
+
+@pytest.mark.parametrize("get_all, model, schema", LISTAGENS, ids=lambda value: getattr(value, '__qualname__', ''))
+def test_listagem_nao_faz_n_mais_1(engine, get_all, model, schema):
+    with database.SessionLocal() as db:
+        if db.query(model.id).limit(2).count() < 2:
+            pytest.skip(f"poucas linhas em {model.__tablename__}")
+    one, _ = listar(engine, get_all, schema, 1)
+    fifty, rows = listar(engine, get_all, schema, 50)
+    assert rows > 1
+    assert fifty == one, f"{one} comandos com limit=1, {fifty} com limit=50"
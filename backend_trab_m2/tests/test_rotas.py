@@ -0,0 +1,13 @@
+def test_openapi_documenta_as_respostas(api):
+    response = api.get("/openapi.json")
+    assert response.status_code == 200
+    paths = response.json()["paths"]
+    assert paths["/api/tags/{id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == { "$ref": "#/components/schemas/Tag" }
+    assert paths["/api/imoveis/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] == { "$ref": "#/components/schemas/PaginatedImovel" }
+
+def test_parametros_internos_nao_vem_da_query(api):
+    # entity_class, schema etc. já foram defaults dos handlers, e portanto parâmetros de query
+    parametros = { "entity_class": "x", "schema": "x", "exception": "x" }
+    id = api.get("/api/tags/", params={ "limit": 1 }).json()["data"][0]["id"]
+    assert api.get(f"/api/tags/{id}", params=parametros).status_code == 200
+    assert api.get("/api/tags/", params={ **parametros, "limit": 1 }).status_code == 200
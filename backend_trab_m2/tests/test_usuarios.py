@@ -0,0 +1,38 @@
+import uuid
+import pytest
+from auth import password_handler
+import database, exceptions, models
+
+@pytest.fixture
+def usuario(api, monkeypatch):
+    monkeypatch.setattr(password_handler, "BCRYPT_ROUNDS", 4)
+    sufixo = uuid.uuid4().hex[:11]
+    dados = { "nome": "usuário do teste", "email": f"{sufixo}@teste.local", "cpf": str(int(sufixo, 16))[:11], "senha": "segredo" }
+    response = api.post("/api/signup", json=dados)
+    assert response.status_code == 200
+    with database.SessionLocal() as db:
+        id = db.query(models.Usuario.id).filter(models.Usuario.email == dados["email"]).scalar()
+    yield id, dados
+    api.delete(f"/api/usuarios/{id}")
+
+def test_email_e_cpf_unicos_entre_os_tipos(api, usuario):
+    _, dados = usuario
+    outro = uuid.uuid4().hex[:11]
+    casos = [
+        ("/api/signup", { **dados, "cpf": str(int(outro, 16))[:11] }, exceptions.UsuarioAlreadyExistError),
+        ("/api/proprietarios/", { **dados, "email": f"{outro}@teste.local" }, exceptions.ProprietarioAlreadyExistError),
+        ("/api/corretores/", { **dados, "percentual_comissao": 5.0, "cpf": str(int(outro, 16))[:11] }, exceptions.CorretorAlreadyExistError)
+    ]
+    for url, corpo, exception in casos:
+        response = api.post(url, json=corpo)
+        assert (response.status_code, response.json()["detail"]) == (exception().status_code, exception().detail)
+
+def test_login_refaz_o_hash_sem_mudar_a_versao(api, usuario, monkeypatch):
+    id, dados = usuario
+    monkeypatch.setattr(password_handler, "BCRYPT_ROUNDS", 5)
+    etag = api.get(f"/api/usuarios/{id}").headers["ETag"]
+    assert api.post("/api/login", json={ "email": dados["email"], "senha": dados["senha"] }).status_code == 200
+    with database.SessionLocal() as db:
+        assert not password_handler.needs_rehash(db.get(models.Usuario, id).senha)
+    assert api.get(f"/api/usuarios/{id}", headers={ "If-None-Match": etag }).status_code == 304
+    assert api.post("/api/login", json={ "email": dados["email"], "senha": "errada" }).status_code == 400